@@ -1,17 +1,222 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
+import re
+import random
+import asyncio
 import json
 import logging
+import orjson
+import httpx
+import concurrent.futures
 from datetime import datetime
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
+from app.config import settings
 from app.core.memory_store import MemoryStore
 
 # Global flags to track when providers have failed
 _bytez_exhausted = False
 _openrouter_exhausted = False
 
+def _json_loads(text: str) -> Any:
+    """
+    Parse JSON with orjson, falling back to the stdlib only for NaN/Infinity
+    literals, which orjson rejects. orjson.JSONDecodeError subclasses
+    json.JSONDecodeError, so callers catch the stdlib exception.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        if "NaN" in text or "Infinity" in text:
+            return json.loads(text)
+        raise
+
+try:
+    import h2  # noqa: F401 - enables httpx HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One pooled async HTTP client shared by every OpenAI-compatible LangChain client,
+# so agents reuse keep-alive connections (multiplexed over HTTP/2 when h2 is
+# installed) instead of each opening their own
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Lazily create the shared async HTTP client for LLM providers."""
+    global _shared_http_client
+    if _shared_http_client is None:
+        _shared_http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(180.0, connect=10.0)
+        )
+    return _shared_http_client
+
+async def warm_shared_http_client(timeout_seconds: float = 5.0):
+    """
+    Open a keep-alive connection to each configured OpenAI-compatible provider
+    through the shared client, so the first real request skips the TLS handshake.
+    Any response status counts as warm; failures are ignored.
+    """
+    urls = []
+    if settings.OPENROUTER_API_KEY:
+        urls.append(settings.OPENROUTER_BASE_URL + "/models")
+    if settings.PERPLEXITY_API_KEY:
+        urls.append("https://api.perplexity.ai")
+    if not urls:
+        return
+    client = get_shared_http_client()
+    results = await asyncio.gather(
+        *(client.head(url, timeout=timeout_seconds) for url in urls),
+        return_exceptions=True
+    )
+    warmed = sum(1 for r in results if not isinstance(r, Exception))
+    logging.info(f"Warmed {warmed}/{len(urls)} LLM provider connections")
+
+async def close_shared_http_client():
+    """Close the shared LLM HTTP client (called on application shutdown)."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
+# One Bytez SDK client per API key, shared by every agent so its underlying HTTP
+# session (and pooled keep-alive connections) is reused across calls
+_shared_bytez_clients: Dict[str, Any] = {}
+
+def get_shared_bytez_client(api_key: str):
+    """Return the process-wide Bytez client for `api_key`, creating it on first use."""
+    client = _shared_bytez_clients.get(api_key)
+    if client is None:
+        from bytez import Bytez
+        client = Bytez(api_key)
+        _shared_bytez_clients[api_key] = client
+    return client
+
+# Bytez model handles keyed by (client identity, model id); the SDK builds a new
+# handle on every client.model() call
+_bytez_models: Dict[Tuple[int, str], Any] = {}
+
+def get_bytez_model(client, model_id: str):
+    """Return a cached Bytez model handle for `model_id` on `client`."""
+    key = (id(client), model_id)
+    model = _bytez_models.get(key)
+    if model is None:
+        model = client.model(model_id)
+        _bytez_models[key] = model
+    return model
+
+# Blocking Bytez SDK calls run on their own bounded pool so a burst of section
+# calls cannot exhaust the default executor used by asyncio.to_thread elsewhere
+BYTEZ_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=settings.BYTEZ_POOL_SIZE,
+    thread_name_prefix="bytez"
+)
+
+async def run_bytez(model, messages: List[Dict[str, str]]):
+    """Run a blocking Bytez `model.run` call on the shared Bytez pool."""
+    return await asyncio.get_running_loop().run_in_executor(BYTEZ_POOL, model.run, messages)
+
+# Precompiled patterns for parse_json_robust
+_FENCE_JSON_OPEN_RE = re.compile(r'^```json\s*')
+_FENCE_OPEN_RE = re.compile(r'^```\s*')
+_FENCE_CLOSE_RE = re.compile(r'\s*```$')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+# Only these characters can change JSON nesting state; the regex engine skips
+# everything in between in C instead of stepping through it in Python
+_JSON_STRUCTURE_RE = re.compile(r'[{}\[\]"\\]')
+
+def _iter_json_structure(text: str, start: int = 0, state: Optional[dict] = None):
+    """
+    Yield (index, char) for brackets/braces outside string literals, from `start`.
+    Pass the same `state` dict with each chunk of a stream to carry string and
+    escape state over chunk boundaries.
+    """
+    in_string = state.get("in_string", False) if state is not None else False
+    escaped_at = state.get("escaped_at", -1) if state is not None else -1
+    try:
+        for m in _JSON_STRUCTURE_RE.finditer(text, start):
+            i = m.start()
+            if i == escaped_at:
+                continue
+            c = text[i]
+            if in_string:
+                if c == '\\':
+                    escaped_at = i + 1
+                elif c == '"':
+                    in_string = False
+                continue
+            if c == '"':
+                in_string = True
+            elif c != '\\':
+                yield i, c
+    finally:
+        if state is not None:
+            state["in_string"] = in_string
+            # Relative to the next chunk: a trailing backslash escapes its first char
+            state["escaped_at"] = escaped_at - len(text)
+
+def _find_first_json_object(text: str) -> Optional[str]:
+    """Return the first balanced top-level {...} block, ignoring braces inside strings."""
+    start = text.find('{')
+    if start == -1:
+        return None
+    depth = 0
+    for i, c in _iter_json_structure(text, start):
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+class _JsonObjectTracker:
+    """
+    Streaming counterpart of _find_first_json_object.
+    feed() returns True once the first top-level JSON object has closed, so a
+    stream can stop before the model spends tokens on trailing prose.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self._scan_state: dict = {}
+
+    def feed(self, text: str) -> bool:
+        start = 0
+        if not self.started:
+            start = text.find('{')
+            if start == -1:
+                return False
+            self.started = True
+        for _, c in _iter_json_structure(text, start, self._scan_state):
+            if c == '{':
+                self.depth += 1
+            elif c == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+# Provider 429s are retried this many times in total, with full-jitter exponential backoff
+RATE_LIMIT_MAX_ATTEMPTS = 3
+RATE_LIMIT_MAX_BACKOFF_SECONDS = 20.0
+
+def is_rate_limited(error: Any) -> bool:
+    """True for provider rate-limit (HTTP 429) errors, which are worth retrying after a backoff."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "rate_limit" in text or "too many requests" in text
+
+def rate_limit_backoff(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(RATE_LIMIT_MAX_BACKOFF_SECONDS, 2.0 ** attempt))
+
 def reset_provider_flags():
     """Reset all provider exhaustion flags."""
     global _bytez_exhausted, _openrouter_exhausted
@@ -41,8 +246,7 @@ class BaseAgent:
         # 1. Bytez Client (Primary)
         if settings.BYTEZ_API_KEY:
             try:
-                from bytez import Bytez
-                self._bytez_client = Bytez(settings.BYTEZ_API_KEY)
+                self._bytez_client = get_shared_bytez_client(settings.BYTEZ_API_KEY)
                 logging.info(f"{self.name}: Bytez client initialized")
             except Exception as e:
                 logging.warning(f"{self.name}: Bytez init failed: {e}")
@@ -55,7 +259,8 @@ class BaseAgent:
                     model="meta-llama/llama-3.3-70b-instruct:free",
                     api_key=settings.OPENROUTER_API_KEY,
                     base_url=settings.OPENROUTER_BASE_URL,
-                    temperature=0
+                    temperature=0,
+                    http_async_client=get_shared_http_client()
                 )
             except Exception as e:
                 logging.warning(f"{self.name}: OpenRouter init failed: {e}")
@@ -68,7 +273,8 @@ class BaseAgent:
                     model=settings.PERPLEXITY_MODEL,
                     api_key=settings.PERPLEXITY_API_KEY,
                     base_url="https://api.perplexity.ai",
-                    temperature=0
+                    temperature=0,
+                    http_async_client=get_shared_http_client()
                 )
             except Exception as e:
                 logging.warning(f"{self.name}: Perplexity init failed: {e}")
@@ -77,32 +283,17 @@ class BaseAgent:
         """Call LLM with simple prompt using fallback chain."""
         return await self._execute_llm_call([{"role": "user", "content": prompt}], timeout_seconds)
 
-    async def think_with_memory(self, task: str, context_categories: List[str], timeout_seconds: int = 180) -> str:
-        """Agent thinks through a task with memory context."""
+    async def think_with_memory(self, task: str, context_categories: List[str], timeout_seconds: int = 180,
+                                memory_context: Optional[str] = None) -> str:
+        """
+        Agent thinks through a task with memory context.
+        Pass a `memory_context` built by build_memory_context() to skip retrieval.
+        """
         logging.info(f"{self.name} is thinking about: {task[:200]}...")
         
         # 1. Retrieve Memory with length limit
-        MAX_MEMORY_CONTEXT_CHARS = 15000  # Limit context to prevent token overflow
-        relevant_memory_str = ""
-        for category in context_categories:
-            if len(relevant_memory_str) >= MAX_MEMORY_CONTEXT_CHARS:
-                break  # Stop if we've hit the limit
-            memories = await self.memory.retrieve_memory(query=task, category=category)
-            if memories:
-                category_str = f"\n[{category.upper()} CONTEXT]:\n"
-                for mem in memories:
-                    mem_entry = f"- {mem}\n"
-                    # Check if adding this would exceed limit
-                    if len(relevant_memory_str) + len(category_str) + len(mem_entry) > MAX_MEMORY_CONTEXT_CHARS:
-                        relevant_memory_str += "... (context truncated to fit token limit)\n"
-                        break
-                    if category_str:  # Only add header once
-                        relevant_memory_str += category_str
-                        category_str = ""  # Clear after first use
-                    relevant_memory_str += mem_entry
-
-        if not relevant_memory_str:
-            relevant_memory_str = "No specific valid memories found for this context."
+        if memory_context is None:
+            memory_context = await self.build_memory_context(task, context_categories)
 
         # 2. Construct Messages
         system_prompt = f"""You are {self.name}, an expert banking ESG analyst assistant.
@@ -115,7 +306,7 @@ class BaseAgent:
         - Return STRICT JSON only if requested.
         
         MEMORY CONTEXT:
-        {relevant_memory_str}
+        {memory_context}
         """
         
         messages = [
@@ -136,6 +327,38 @@ class BaseAgent:
         
         return response
 
+    async def build_memory_context(self, task: str, context_categories: List[str],
+                                   preloaded: Optional[Dict[str, List[Dict]]] = None) -> str:
+        """
+        Retrieve memories for the given categories and render them as a bounded prompt block.
+        Categories present in `preloaded` (category -> memories) are not retrieved again.
+        """
+        MAX_MEMORY_CONTEXT_CHARS = 15000  # Limit context to prevent token overflow
+        relevant_memory_str = ""
+        for category in context_categories:
+            if len(relevant_memory_str) >= MAX_MEMORY_CONTEXT_CHARS:
+                break  # Stop if we've hit the limit
+            if preloaded is not None and category in preloaded:
+                memories = preloaded[category]
+            else:
+                memories = await self.memory.retrieve_memory(query=task, category=category)
+            if memories:
+                category_str = f"\n[{category.upper()} CONTEXT]:\n"
+                for mem in memories:
+                    mem_entry = f"- {mem}\n"
+                    # Check if adding this would exceed limit
+                    if len(relevant_memory_str) + len(category_str) + len(mem_entry) > MAX_MEMORY_CONTEXT_CHARS:
+                        relevant_memory_str += "... (context truncated to fit token limit)\n"
+                        break
+                    if category_str:  # Only add header once
+                        relevant_memory_str += category_str
+                        category_str = ""  # Clear after first use
+                    relevant_memory_str += mem_entry
+
+        if not relevant_memory_str:
+            relevant_memory_str = "No specific valid memories found for this context."
+        return relevant_memory_str
+
     async def _execute_llm_call(self, messages: List[Dict[str, str]], timeout_seconds: int) -> str:
         """Execute LLM call with updated fallback logic: Bytez -> OpenRouter -> Perplexity."""
         from app.config import settings
@@ -145,10 +368,9 @@ class BaseAgent:
         # Helper: Call Bytez
         async def call_bytez_api(model_name: str, msgs: List[Dict[str, str]]) -> str:
             if not self._bytez_client: raise ValueError("No Bytez Client")
-            model = self._bytez_client.model(model_name)
+            model = get_bytez_model(self._bytez_client, model_name)
             
-            loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(None, lambda: model.run(msgs))
+            results = await run_bytez(model, msgs)
             
             if results.error: raise ValueError(f"Bytez Error: {results.error}")
             
@@ -217,20 +439,24 @@ class BaseAgent:
         Returns:
             Parsed dict, or empty dict if all strategies fail
         """
-        import re
-        
         if not text or not text.strip():
             logging.warning(f"[{context}] Empty response")
             return {}
         
+        # Fast path: well-formed JSON (e.g. from JSON-mode providers) parses without any cleanup
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+        
         # Strategy 1: Clean markdown code blocks and try direct parse
         clean_text = text.strip()
-        clean_text = re.sub(r'^```json\s*', '', clean_text)
-        clean_text = re.sub(r'^```\s*', '', clean_text)
-        clean_text = re.sub(r'\s*```$', '', clean_text)
+        clean_text = _FENCE_JSON_OPEN_RE.sub('', clean_text)
+        clean_text = _FENCE_OPEN_RE.sub('', clean_text)
+        clean_text = _FENCE_CLOSE_RE.sub('', clean_text)
         
         try:
-            return json.loads(clean_text)
+            return _json_loads(clean_text)
         except json.JSONDecodeError:
             pass
         
@@ -240,85 +466,79 @@ class BaseAgent:
             last_brace = clean_text.rfind('}')
             if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
                 json_candidate = clean_text[first_brace:last_brace + 1]
-                return json.loads(json_candidate)
+                return _json_loads(json_candidate)
         except json.JSONDecodeError:
             pass
         
-        # Strategy 3: Try to find and parse only the first complete JSON object
+        # Strategy 3: Parse only the first balanced, string-aware JSON object
         # (handles "Extra data" errors from trailing content)
         try:
-            brace_count = 0
-            json_start = None
-            for i, char in enumerate(clean_text):
-                if char == '{':
-                    if brace_count == 0:
-                        json_start = i
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0 and json_start is not None:
-                        json_candidate = clean_text[json_start:i + 1]
-                        return json.loads(json_candidate)
-        except json.JSONDecodeError:
-            pass
-        
-        # Strategy 4: Use regex to find nested JSON-like structure
-        try:
-            # Recursive matching for nested braces
-            def find_json_object(s):
-                start = s.find('{')
-                if start == -1:
-                    return None
-                depth = 0
-                in_string = False
-                escape_next = False
-                for i in range(start, len(s)):
-                    c = s[i]
-                    if escape_next:
-                        escape_next = False
-                        continue
-                    if c == '\\':
-                        escape_next = True
-                        continue
-                    if c == '"':
-                        in_string = not in_string
-                        continue
-                    if in_string:
-                        continue
-                    if c == '{':
-                        depth += 1
-                    elif c == '}':
-                        depth -= 1
-                        if depth == 0:
-                            return s[start:i+1]
-                return None
-            
-            json_str = find_json_object(clean_text)
+            json_str = _find_first_json_object(clean_text)
             if json_str:
-                return json.loads(json_str)
+                return _json_loads(json_str)
         except json.JSONDecodeError:
             pass
         
-        # Strategy 5: Try to fix common JSON issues
+        # Strategy 4: Try to fix common JSON issues
         try:
             # Remove trailing commas before } or ]
-            fixed_text = re.sub(r',(\s*[}\]])', r'\1', clean_text)
+            fixed_text = _TRAILING_COMMA_RE.sub(r'\1', clean_text)
             # Find JSON boundaries again
             first_brace = fixed_text.find('{')
             last_brace = fixed_text.rfind('}')
             if first_brace != -1 and last_brace != -1:
                 fixed_text = fixed_text[first_brace:last_brace + 1]
-                return json.loads(fixed_text)
+                return _json_loads(fixed_text)
         except json.JSONDecodeError:
             pass
-        
+
+        # Strategy 5: Close a truncated response (e.g. a stream aborted by the idle watchdog)
+        try:
+            closed_text = self._close_truncated_json(clean_text)
+            if closed_text:
+                return _json_loads(closed_text)
+        except json.JSONDecodeError:
+            pass
+
         logging.warning(f"[{context}] All JSON parsing strategies failed. Text preview: {clean_text[:200]}...")
         return {}
 
-    async def remember(self, category: str, key: str, value: Any, 
-                      metadata: Optional[Dict] = None):
-        """Agent stores something in memory."""
-        await self.memory.store_fact(category, key, value, metadata)
+    @staticmethod
+    def _close_truncated_json(text: str) -> Optional[str]:
+        """
+        Best-effort repair of truncated JSON: drops the unfinished trailing element
+        and appends the closing brackets that are still open.
+        """
+        starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+        if not starts:
+            return None
+        start = min(starts)
+
+        stack = []
+        last_complete = None  # (index, stack snapshot) after the last closed value
+        for i, c in _iter_json_structure(text, start):
+            if c in '{[':
+                stack.append('}' if c == '{' else ']')
+            elif c in '}]':
+                if not stack:
+                    break
+                stack.pop()
+                if not stack:
+                    return text[start:i + 1]
+                last_complete = (i, list(stack))
+
+        if last_complete is None:
+            return None
+        end, open_stack = last_complete
+        return text[start:end + 1] + "".join(reversed(open_stack))
+
+    async def remember(self, category: str, key: str, value: Any,
+                      metadata: Optional[Dict] = None, defer_remote: bool = False):
+        """
+        Agent stores something in memory.
+        defer_remote=True keeps the write local until the memory store is flushed.
+        """
+        await self.memory.store_fact(category, key, value, metadata, defer_remote=defer_remote)
         
         self.agent_logs.append({
             "timestamp": datetime.now().isoformat(),
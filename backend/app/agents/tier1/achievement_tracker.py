@@ -49,7 +49,7 @@ Output STRICT JSON ONLY:
         # Use robust JSON parsing instead of raising exception
         data = self.parse_json_robust(res, "achievement_tracker")
         
-        if data and "error" not in str(data).lower() and "achievement_history" in data:
+        if data and "error" not in data and "achievement_history" in data:
             await self.remember("achievement", "track_record", data)
             return data
         else:
@@ -1,16 +1,146 @@
-from app.agents.base_agent import BaseAgent
+from app.agents.base_agent import (
+    BaseAgent, RATE_LIMIT_MAX_ATTEMPTS, _JsonObjectTracker, get_bytez_model, is_rate_limited,
+    rate_limit_backoff, run_bytez
+)
 import logging
 import asyncio
+import math
 import os
+import time
+import copy
+import hashlib
 import json
-import concurrent.futures
+import orjson
+from collections import OrderedDict
 from datetime import datetime
+from typing import Any, Dict, Final, List, Optional, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
-
-
-CREDIT_MEMO_JSON_SCHEMA_HINT = """
+from app.config import settings
+from app.core.semantic_cache import SemanticCache
+from app.agents.tier4.schemas import (
+    is_valid,
+    validate_achievability,
+    validate_synthesis,
+    validate_visuals,
+    validate_credit_memo_section,
+)
+
+# Provider keys are resolved once at import instead of on every memo
+_GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY") or settings.GEMINI_API_KEY
+
+# Streaming section calls are cancelled only after this many seconds without a new chunk
+SECTION_IDLE_TIMEOUT_SECONDS = 30
+
+# With hedging, a premium writer's section is awaited this long before the
+# cheap model's speculative result is accepted instead
+SECTION_PREMIUM_SLA_SECONDS = 30
+
+# Once this fraction of memo sections has come back valid, stragglers are given
+# until MEMO_STRAGGLER_GRACE_SECONDS after launch and then cancelled
+MEMO_SECTION_QUORUM = 0.8
+MEMO_STRAGGLER_GRACE_SECONDS = 45
+
+# Per-section size caps applied before the memo is cached and stored in memory
+SECTION_MARKDOWN_MAX_CHARS = 6000
+SECTION_MAX_BULLETS = 20
+
+# Overall deadline for one section call, shared by its rate-limit retries
+SECTION_CALL_BUDGET_SECONDS = 180
+
+# Credit memo memory contexts longer than this are summarized before the section fan-out
+MEMORY_SUMMARY_THRESHOLD_CHARS = 8000
+MEMORY_SUMMARY_TIMEOUT_SECONDS = 45
+_MEMORY_SUMMARY_CACHE_SIZE = 64
+
+# sha256(memory context) -> summary, shared across agents in this process
+_memory_summaries: "OrderedDict[str, str]" = OrderedDict()
+
+# Exact-match memo of parsed section responses keyed on sha256(model + system + task).
+# The system prompt embeds the memory context, so any memory change is a new key.
+SECTION_RESPONSE_TTL_SECONDS = 24 * 3600
+_SECTION_RESPONSE_CACHE_SIZE = 256
+_section_responses: "OrderedDict[bytes, Tuple[float, Any]]" = OrderedDict()
+
+# Whole credit memos, and individual sections so a partially failed memo still reuses its good ones
+analysis_cache = SemanticCache()
+section_cache = SemanticCache(max_entries=1024)
+
+
+def _serialize_memory(mem: Any, cache: Dict[int, str]) -> str:
+    """
+    Serialize a memory item for prompt injection with stable key order.
+    `cache` is scoped to a single prompt build so items shared across
+    categories are only serialized once.
+    """
+    if isinstance(mem, str):
+        return mem
+    key = id(mem)
+    serialized = cache.get(key)
+    if serialized is None:
+        serialized = orjson.dumps(mem, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode()
+        cache[key] = serialized
+    return serialized
+
+
+# Gemini clients are stateless and reused across memos instead of rebuilt per call
+_gemini_clients: Dict[str, ChatGoogleGenerativeAI] = {}
+
+
+def _get_gemini_client(purpose: str, **kwargs) -> ChatGoogleGenerativeAI:
+    """Return the process-wide Gemini 2.0 Flash client for `purpose`, creating it once."""
+    client = _gemini_clients.get(purpose)
+    if client is None:
+        client = ChatGoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            google_api_key=_GEMINI_API_KEY,
+            temperature=0,
+            **kwargs
+        )
+        _gemini_clients[purpose] = client
+    return client
+
+
+def _section_cache_key(model_id: str, system: str, task: str) -> bytes:
+    """Hash the full prompt pair sent to one model."""
+    h = hashlib.sha256(model_id.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(system.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(task.encode("utf-8"))
+    return h.digest()
+
+
+def _get_cached_section(key: bytes) -> Any:
+    """Return a copy of a cached section response, or None on miss/expiry."""
+    entry = _section_responses.get(key)
+    if entry is None:
+        return None
+    stored_at, result = entry
+    if time.time() - stored_at > SECTION_RESPONSE_TTL_SECONDS:
+        del _section_responses[key]
+        return None
+    _section_responses.move_to_end(key)
+    return copy.deepcopy(result)
+
+
+def _put_cached_section(key: bytes, result: Any):
+    """Memoize a non-empty parsed section response."""
+    if not result:
+        return
+    _section_responses[key] = (time.time(), copy.deepcopy(result))
+    _section_responses.move_to_end(key)
+    while len(_section_responses) > _SECTION_RESPONSE_CACHE_SIZE:
+        _section_responses.popitem(last=False)
+
+
+def _today() -> str:
+    """Memo as-of date in YYYY-MM-DD format."""
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+CREDIT_MEMO_JSON_SCHEMA_HINT: Final[str] = """
 Return STRICT JSON ONLY with this shape:
 {
     "meta": {
@@ -82,68 +212,245 @@ Return STRICT JSON ONLY with this shape:
 }
 """
 
-class AnalysisAgents(BaseAgent):
+# Static system prefix shared by every section call in draft_credit_memo.
+# Must stay free of per-borrower data so provider prompt caches can hit on it.
+CREDIT_MEMO_SYSTEM_STATIC: Final[str] = """You are an expert ESG banking analyst generating a credit memo.
+
+CRITICAL RULES:
+- Return STRICT JSON only - no markdown, no commentary
+- Use only facts from the MEMORY CONTEXT below
+- If information is missing, write "Not evidenced"
+- Be professional and bank-grade in your analysis
+"""
+
+# Single-section JSON contract, kept in the static system prefix so the only
+# per-call text is the section-specific tail of the user message
+SECTION_SCHEMA_PROMPT: Final[str] = """Each request asks for ONE credit memo section. Return it as a single JSON object:
+{"id": "...", "title": "...", "markdown": "...", "bullets": ["..."], "evidence": [{"source": "...", "reference": "...", "snippet": "..."}]}
+"""
+
+# Static parts of the memo figures; only the numeric series are filled in per memo
+_FIG_TEMPLATE = (
+    ("fig_peer_comparison", "Peer Benchmarking (Reduction Target vs Peers)", "bar"),
+    ("fig_trajectory", "Emissions Trajectory (Indexed to Baseline)", "line"),
+)
+_PEER_LABELS = ("Company Target", "Peer Median", "Top Quartile")
+_DEFAULT_PEER_MEDIAN = 5.0
+_DEFAULT_PEER_TOP_QUARTILE = 7.0
+
+# Default risk register used when the generated memo contains a risks section
+_RISK_REGISTER_TEMPLATE = (
+    ("R1", "MEDIUM", "Execution", "Target achievement depends on successful implementation of transition plan", "Regular progress reporting", "Quarterly sustainability reports"),
+    ("R2", "LOW", "Data", "Emissions data quality and methodology consistency", "Third-party verification", "Annual audit of emissions data"),
+    ("R3", "LOW", "Regulatory", "Changing regulatory requirements", "Flexible covenant structure", "Methodology update clause"),
+)
+
+# Default recommended terms attached to every generated memo
+_RECOMMENDED_DECISION = "CONDITIONAL_APPROVAL"
+_RECOMMENDED_CONDITIONS = ("Annual sustainability report submission", "Third-party verification of emissions", "Board oversight confirmation")
+_RECOMMENDED_MONITORING = ("Quarterly progress updates", "Annual KPI verification", "Mid-term target review")
+_RECOMMENDED_COVENANTS = ("Information covenant: Annual ESG reporting", "Performance covenant: On-track to meet interim targets")
+
+# Placeholder section used when no writer produced a valid section
+_EMPTY_MEMO_SECTION = (
+    "executive_summary",
+    "Executive Summary",
+    "### Multi-Model Generation\n\nThe distributed credit memo generation encountered issues. Please review individual agent outputs.",
+    ("Multi-model approach used", "Some sections may be incomplete"),
+)
+
+# Stands in for a single section that no model produced in time
+_MISSING_SECTION_MARKDOWN = "This section could not be generated in time. Please regenerate the credit memo or review the underlying agent outputs."
+
+
+def _build_figures(target_value: float, baseline_year: int, target_year: int) -> list:
+    """Fill the figure templates with the borrower's target and timeline."""
+    (peer_id, peer_title, peer_type), (traj_id, traj_title, traj_type) = _FIG_TEMPLATE
+    midpoint_year = (baseline_year + target_year) // 2
+    return [
+        {
+            "id": peer_id,
+            "title": peer_title,
+            "type": peer_type,
+            "data": {"labels": list(_PEER_LABELS), "dataset": [{"label": "Reduction %", "data": [target_value, _DEFAULT_PEER_MEDIAN, _DEFAULT_PEER_TOP_QUARTILE]}]}
+        },
+        {
+            "id": traj_id,
+            "title": traj_title,
+            "type": traj_type,
+            "data": {"labels": [str(baseline_year), str(midpoint_year), str(target_year)], "data": [100, 100 - target_value / 2, 100 - target_value]}
+        }
+    ]
+
+
+def _build_risk_register() -> list:
+    """Materialize the default risk register as fresh dicts."""
+    return [
+        {"id": rid, "severity": severity, "theme": theme, "description": description, "mitigant": mitigant, "covenant_or_condition": covenant, "evidence": []}
+        for rid, severity, theme, description, mitigant, covenant in _RISK_REGISTER_TEMPLATE
+    ]
+
+
+def _build_recommended_terms() -> dict:
+    """Materialize the default recommended terms as fresh lists."""
+    return {
+        "decision": _RECOMMENDED_DECISION,
+        "conditions": list(_RECOMMENDED_CONDITIONS),
+        "monitoring_plan": list(_RECOMMENDED_MONITORING),
+        "covenants": list(_RECOMMENDED_COVENANTS)
+    }
+
+
+def _build_empty_memo_sections() -> list:
+    """Materialize the placeholder section list for a memo with no generated sections."""
+    sec_id, title, markdown, bullets = _EMPTY_MEMO_SECTION
+    return [{"id": sec_id, "title": title, "markdown": markdown, "bullets": list(bullets), "evidence": []}]
+
+
+def _build_missing_section(sec_id: str, title: str) -> dict:
+    """Materialize the placeholder for one section that was not generated."""
+    return {"id": sec_id, "title": title, "markdown": _MISSING_SECTION_MARKDOWN, "bullets": ["Section not generated"], "evidence": []}
+
+
+def _dedupe_evidence(items: Any) -> list:
+    """Drop repeated evidence entries, keyed on (source, reference, snippet), keeping first-seen order."""
+    if not isinstance(items, list):
+        return []
+    seen = set()
+    unique = []
+    for item in items:
+        if isinstance(item, dict):
+            key = (str(item.get("source", "")).strip(), str(item.get("reference", "")).strip(), str(item.get("snippet", "")).strip())
+        else:
+            key = str(item).strip()
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+async def _gather_with_quorum(coros: List[Any], is_ok, quorum: float, grace_seconds: float) -> List[Any]:
     """
-    Tier 4: Analysis & Synthesis.
-    Proprietary risk modeling and report synthesis.
+    Like asyncio.gather(return_exceptions=True), but once `quorum` of the results
+    satisfy `is_ok`, tasks still running `grace_seconds` after launch are cancelled.
+    Cancelled slots hold an asyncio.TimeoutError.
     """
-    
-    def _create_fallback_memo(self, error_msg: str) -> dict:
-        """Create a fallback credit memo when AI generation fails."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        return {
-            "meta": {
-                "report_title": "KPI Assessment Credit Memo",
-                "prepared_for": "Credit Committee",
-                "prepared_by": "GreenGuard ESG Analyst (Fallback Mode)",
-                "as_of_date": today,
-                "version": "1.0",
-                "models_used": ["Fallback"],
-                "error": error_msg
-            },
-            "inputs_summary": {
-                "company_name": "Unknown",
-                "industry_sector": "Unknown",
-                "loan_type": "Sustainability-Linked Loan",
-                "facility_amount": "Not specified",
-                "tenor_years": 0,
-                "kpi": {
-                    "metric": "GHG Emissions Reduction",
-                    "target_value": 0,
-                    "target_unit": "%",
-                    "baseline_value": 0,
-                    "baseline_year": 0,
-                    "target_year": 0,
-                    "emissions_scope": "Unknown"
-                }
-            },
-            "data_quality": {
-                "documents_reviewed": [],
-                "evidence_gaps": ["AI generation failed - manual review required"],
-                "confidence": "LOW"
-            },
-            "sections": [
-                {
-                    "id": "executive_summary",
-                    "title": "Executive Summary",
-                    "markdown": f"### Generation Error\n\nThe credit memo could not be generated automatically due to: {error_msg}.\n\nPlease review the raw data and individual agent outputs for the assessment.",
-                    "bullets": ["AI generation failed", "Manual review required", f"Error: {error_msg}"],
-                    "evidence": []
-                }
-            ],
-            "figures": [],
-            "risk_register": [],
-            "recommended_terms": {
-                "decision": "MANUAL_REVIEW",
-                "conditions": ["Complete manual assessment required"],
-                "monitoring_plan": ["TBD after manual review"],
-                "covenants": ["TBD after manual review"]
-            }
+    start = time.monotonic()
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    needed = max(1, math.ceil(len(tasks) * quorum))
+    pending = set(tasks)
+    ok_count = 0
+    try:
+        while pending:
+            timeout = None
+            if ok_count >= needed:
+                timeout = max(0.0, start + grace_seconds - time.monotonic())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            ok_count += sum(1 for t in done if not t.cancelled() and t.exception() is None and is_ok(t.result()))
+    finally:
+        for t in pending:
+            t.cancel()
+    if pending:
+        logging.warning(f"Cancelled {len(pending)} straggling section call(s) after quorum")
+    return [
+        asyncio.TimeoutError("cancelled after section quorum") if t in pending or t.cancelled()
+        else t.exception() or t.result()
+        for t in tasks
+    ]
+
+
+def _trim_section(section: dict) -> dict:
+    """Bound a generated section before it is stored: cap markdown, drop empty bullets, dedupe evidence."""
+    markdown = section.get("markdown")
+    if isinstance(markdown, str) and len(markdown) > SECTION_MARKDOWN_MAX_CHARS:
+        section["markdown"] = markdown[:SECTION_MARKDOWN_MAX_CHARS] + "\n\n*(truncated)*"
+    if isinstance(section.get("bullets"), list):
+        section["bullets"] = [b for b in section["bullets"] if b][:SECTION_MAX_BULLETS]
+    if "evidence" in section:
+        section["evidence"] = _dedupe_evidence(section["evidence"])
+    return section
+
+
+# Fallback memo skeleton; _create_fallback_memo deep-copies it and fills in the error
+_FALLBACK_MEMO_TEMPLATE: Final[Dict[str, Any]] = {
+    "meta": {
+        "report_title": "KPI Assessment Credit Memo",
+        "prepared_for": "Credit Committee",
+        "prepared_by": "GreenGuard ESG Analyst (Fallback Mode)",
+        "as_of_date": "",
+        "version": "1.0",
+        "models_used": ["Fallback"],
+        "error": ""
+    },
+    "inputs_summary": {
+        "company_name": "Unknown",
+        "industry_sector": "Unknown",
+        "loan_type": "Sustainability-Linked Loan",
+        "facility_amount": "Not specified",
+        "tenor_years": 0,
+        "kpi": {
+            "metric": "GHG Emissions Reduction",
+            "target_value": 0,
+            "target_unit": "%",
+            "baseline_value": 0,
+            "baseline_year": 0,
+            "target_year": 0,
+            "emissions_scope": "Unknown"
         }
-    
-    async def assess_achievability(self):
-        logging.info(f"{self.name}: Assessing Achievability & Risk.")
-        task = """
+    },
+    "data_quality": {
+        "documents_reviewed": [],
+        "evidence_gaps": ["AI generation failed - manual review required"],
+        "confidence": "LOW"
+    },
+    "sections": [
+        {
+            "id": "executive_summary",
+            "title": "Executive Summary",
+            "markdown": "",
+            "bullets": ["AI generation failed", "Manual review required", ""],
+            "evidence": []
+        }
+    ],
+    "figures": [],
+    "risk_register": [],
+    "recommended_terms": {
+        "decision": "MANUAL_REVIEW",
+        "conditions": ["Complete manual assessment required"],
+        "monitoring_plan": ["TBD after manual review"],
+        "covenants": ["TBD after manual review"]
+    }
+}
+
+
+_MEMORY_SUMMARY_PROMPT: Final[str] = """Condense the memory records below for a credit analyst.
+
+Rules:
+- Keep every [CATEGORY] header, in the same order.
+- At most 400 tokens per category.
+- Preserve every number, unit, year, percentage, company name, document name and source reference exactly.
+- Drop duplicated records, JSON syntax and boilerplate.
+- Do not add facts, opinions or conclusions.
+
+MEMORY RECORDS:
+"""
+
+
+def _section_task(section_id: str, title: str, instructions: str) -> str:
+    """Section-specific tail of a section call; the JSON contract lives in SECTION_SCHEMA_PROMPT."""
+    return f'{instructions}\n\nReturn this section with "id": "{section_id}" and "title": "{title}".'
+
+
+# Memory categories each analysis pass reads; run_all() preloads their union once
+_ACHIEVABILITY_CATEGORIES: Final[List[str]] = ["capex", "governance", "achievement", "target", "raw_extraction", "regulatory"]
+_SYNTHESIS_CATEGORIES: Final[List[str]] = ["benchmark", "regulatory", "analysis", "achievement", "raw_extraction", "target", "banker_input"]
+_VISUALS_CATEGORIES: Final[List[str]] = ["benchmark", "target"]
+_ANALYSIS_MEMORY_QUERY: Final[str] = "credit analysis achievability evidence benchmark target"
+
+
+_TASK_ACHIEVABILITY: Final[str] = """
 You are conducting a COMPREHENSIVE achievability and credibility assessment for a bank credit memo.
 
 Synthesize ALL available evidence from Capex plans, Governance structures, Track Record, and Target information to produce a DETAILED assessment.
@@ -204,28 +511,9 @@ Return STRICT JSON only:
     "evidence": ["List of all evidence sources used in this assessment with specific citations..."]
 }
 """
-        res = await self.think_with_memory(task, ["capex", "governance", "achievement", "target", "raw_extraction", "regulatory"])
-        
-        data = self.parse_json_robust(res, "achievability")
-        
-        if data and "score" in data:
-            await self.remember("analysis", "achievability", data)
-            return data
-        else:
-            logging.error(f"Tier4 achievability failed: Could not parse response. Preview: {res[:300] if res else 'Empty'}")
-            # Return a safe fallback instead of crashing
-            return {
-                "score": 0,
-                "credibility_level": "LOW",
-                "signals": {},
-                "top_risks": [],
-                "reasoning": "Assessment failed due to AI provider error.",
-                "evidence": []
-            }
 
-    async def synthesize_evidence(self):
-        logging.info(f"{self.name}: Synthesizing Evidence.")
-        task = """
+
+_TASK_SYNTHESIS: Final[str] = """
 You are drafting a COMPREHENSIVE executive-summary style narrative for a bank credit memo.
 
 This narrative will be the primary content read by the Credit Committee. It must be:
@@ -283,25 +571,9 @@ Return STRICT JSON only:
     ]
 }
 """
-        res = await self.think_with_memory(task, ["benchmark", "regulatory", "analysis", "achievement", "raw_extraction", "target", "banker_input"])
-        
-        data = self.parse_json_robust(res, "synthesize_evidence")
-        
-        if data and "narrative" in data:
-            await self.remember("analysis", "synthesis", data)
-            return data
-        else:
-            logging.error(f"Tier4 synthesis failed: Could not parse response. Preview: {res[:300] if res else 'Empty'}")
-            return {
-                "narrative": "Error generating synthesis narrative due to AI provider failure.",
-                "evidence": []
-            }
 
-    async def generate_visual_json(self):
-        # Generates structure for Frontend Charts (e.g. Recharts)
-        logging.info(f"{self.name}: Generating Visual Chart Data.")
 
-        task = """
+_TASK_VISUALS: Final[str] = """
 Generate chart-ready JSON for the frontend visualization.
 
 HARD RULES:
@@ -321,46 +593,13 @@ Return STRICT JSON only:
     }
 }
 """
-        res = await self.think_with_memory(task, ["benchmark", "target"])
-        
-        data = self.parse_json_robust(res, "generate_visual_json")
-        
-        if data and ("peer_comparison" in data or "emissions_trajectory" in data):
-            await self.remember("analysis", "visuals", data)
-            return data
-        else:
-            logging.error(f"Tier4 visuals failed: Could not parse response. Preview: {res[:300] if res else 'Empty'}")
-            return {
-                "peer_comparison": {
-                    "labels": ["Error"], 
-                    "dataset": [{"label": "Reduction %", "data": [0]}]
-                },
-                "emissions_trajectory": {
-                    "labels": ["Error"],
-                    "data": [0]
-                }
-            }
 
-    async def draft_credit_memo(self):
-        """
-        Generate a credit memo using the base agent's robust fallback chain.
-        Executes sections in parallel using the configured unified LLM logic.
-        """
-        logging.info(f"{self.name}: Starting Credit Memo Generation via Unified LLM Logic")
-        
-        # Gather memory context
-        memory_context = ""
-        for category in ["banker_input", "target", "benchmark", "regulatory", "analysis", "achievement", "raw_extraction", "document_metadata"]:
-            memories = await self.memory.retrieve_memory(query="credit memo generation", category=category)
-            if memories:
-                memory_context += f"\n[{category.upper()}]:\n"
-                for mem in memories:
-                    memory_context += f"- {mem}\n"
-        
-        # Define tasks
-        task_strategic = """Generate these 3 credit memo sections as a JSON array.
 
-SECTION 1: executive_summary (500-700 words)
+# One short prompt per section, each answered with a single JSON object:
+# the critical path is the longest section rather than a 3-4 section bundle,
+# and a failed call only loses its own section.
+_CREDIT_MEMO_SECTION_SPECS: Final[Tuple[Tuple[str, str, str], ...]] = (
+    ("executive_summary", "Executive Summary", """SECTION: executive_summary (500-700 words)
 Write a comprehensive executive summary following this EXACT structure:
 
 ## 📘 Sustainability-Linked Loan KPI Ambition & Achievability Assessment
@@ -392,8 +631,8 @@ Create a table:
 
 **Why This KPI Matters for Bankers:**
 Explain materiality, auditability, and regulatory preference for this type of KPI.
-
-SECTION 2: risks (400-500 words)
+"""),
+    ("risks", "Risk Assessment", """SECTION: risks (400-500 words)
 Write a detailed risk assessment with this structure:
 
 ## 7. Risk Flags Review
@@ -414,8 +653,8 @@ For each risk, provide:
 - Residual risk level
 
 Conclude with: "No material ESG or KPI-related red flags identified" or list specific flags.
-
-SECTION 3: recommendation (400-500 words)
+"""),
+    ("recommendation", "Credit Recommendation and Terms", """SECTION: recommendation (400-500 words)
 Write the final credit recommendation with this structure:
 
 ## 8. Final Credit Recommendation
@@ -446,17 +685,8 @@ List 3-5 ongoing monitoring requirements
 ### One-Line Credit Memo Summary
 Provide a single sentence summary suitable for credit committee:
 > "[Company] presents a [description] KPI that is [validation status], [peer comparison], and [achievement status], resulting in [risk level]."
-
-Return STRICT JSON only:
-[
-    {"id": "executive_summary", "title": "Executive Summary", "markdown": "...", "bullets": ["..."], "evidence": [{"source": "...", "reference": "...", "snippet": "..."}]},
-    {"id": "risks", "title": "Risk Assessment", "markdown": "...", "bullets": ["..."], "evidence": [...]},
-    {"id": "recommendation", "title": "Credit Recommendation and Terms", "markdown": "...", "bullets": ["..."], "evidence": [...]}
-]"""
-        
-        task_analytical = """Generate these 3 credit memo sections as a JSON array.
-
-SECTION 1: kpi_definition (300-400 words)
+"""),
+    ("kpi_definition", "KPI Definition & Boundary", """SECTION: kpi_definition (300-400 words)
 Write the KPI Definition section with this structure:
 
 ## 1. KPI Definition & Transaction Context
@@ -481,8 +711,8 @@ Explain:
 - Auditability and manipulation resistance
 - Regulatory preference (EU EBA, ICMA SLLP)
 - Comparison to intensity-based alternatives
-
-SECTION 2: benchmarking (500-600 words)
+"""),
+    ("benchmarking", "5-Layer Benchmarking Analysis", """SECTION: benchmarking (500-600 words)
 Write a 5-layer benchmarking analysis:
 
 ## 3. Peer Benchmarking & Ambition Analysis
@@ -520,8 +750,8 @@ Create a comparison with SBTi peers:
 
 ### Final Ambition Classification
 State clearly: HIGHLY AMBITIOUS (>75th percentile) / AMBITIOUS (50-75th) / MARKET-ALIGNED (25-50th) / BELOW MARKET (<25th)
-
-SECTION 3: track_record (300-400 words)
+"""),
+    ("track_record", "Historical Performance / Track Record", """SECTION: track_record (300-400 words)
 Write the performance assessment:
 
 ## 4. Performance vs Target (Reality Check)
@@ -553,17 +783,8 @@ Summarize with signals:
 ✅ Execution capability proven / ❌ Execution concerns
 ✅ KPI not "easy" or cosmetic / ❌ Target appears unambitious
 ✅ Downside risk minimal / ❌ Elevated downside risk
-
-Return STRICT JSON only:
-[
-    {"id": "kpi_definition", "title": "KPI Definition & Boundary", "markdown": "...", "bullets": ["..."], "evidence": [{"source": "...", "reference": "...", "snippet": "..."}]},
-    {"id": "benchmarking", "title": "5-Layer Benchmarking Analysis", "markdown": "...", "bullets": ["..."], "evidence": [...]},
-    {"id": "track_record", "title": "Historical Performance / Track Record", "markdown": "...", "bullets": ["..."], "evidence": [...]}
-]"""
-        
-        task_data = """Generate these 4 credit memo sections as a JSON array.
-
-SECTION 1: documents_reviewed (200-300 words)
+"""),
+    ("documents_reviewed", "Documents Reviewed", """SECTION: documents_reviewed (200-300 words)
 Write the documents analysis section:
 
 ## 2. Baseline Integrity & Data Quality (Foundation Check)
@@ -597,8 +818,8 @@ or
 🟡 Baseline quality: MODERATE / REQUIRES VERIFICATION
 or
 ❌ Baseline quality: WEAK / NOT DEFENSIBLE
-
-SECTION 2: extracted_data (300-400 words)
+"""),
+    ("extracted_data", "Extracted KPI & Governance Data", """SECTION: extracted_data (300-400 words)
 Write the extracted data section:
 
 ## Extracted KPI & Governance Data
@@ -626,8 +847,8 @@ Write the extracted data section:
 | Sustainability Committee | Yes/No + details | Evidenced/Not Evidenced |
 | Executive ESG Compensation | [%] linked | Evidenced/Not Evidenced |
 | Third-Party Verification | [Auditor name] | Evidenced/Not Evidenced |
-
-SECTION 3: credibility_signals (400-500 words)
+"""),
+    ("credibility_signals", "Credibility Signals & Evidence Gaps", """SECTION: credibility_signals (400-500 words)
 Write the achievability assessment:
 
 ## 5. Achievability Assessment (Core Credit Question)
@@ -670,8 +891,8 @@ or
 🟡 MODERATE – credible with conditions
 or
 🔴 LOW – significant execution concerns
-
-SECTION 4: sbti_benchmark (300-400 words)
+"""),
+    ("sbti_benchmark", "Deterministic SBTi Benchmark", """SECTION: sbti_benchmark (300-400 words)
 Write the external validation section:
 
 ## 6. External Validation & Regulatory Comfort
@@ -712,17 +933,233 @@ Assessment against:
 |--------------|----------|
 | E1 - Climate | ✅ Addressed / 🟡 Partial / ❌ Not Addressed |
 | G1 - Governance | ✅ Addressed / 🟡 Partial / ❌ Not Addressed |
+"""),
+)
+_CREDIT_MEMO_SECTION_TASKS: Final[Tuple[Tuple[str, str], ...]] = tuple(
+    (sec_id, _section_task(sec_id, title, instructions)) for sec_id, title, instructions in _CREDIT_MEMO_SECTION_SPECS
+)
+_CREDIT_MEMO_SECTION_IDS: Final[frozenset] = frozenset(sec_id for sec_id, _, _ in _CREDIT_MEMO_SECTION_SPECS)
 
-Return STRICT JSON only:
-[
-    {"id": "documents_reviewed", "title": "Documents Reviewed", "markdown": "...", "bullets": ["..."], "evidence": [{"source": "...", "reference": "...", "snippet": "..."}]},
-    {"id": "extracted_data", "title": "Extracted KPI & Governance Data", "markdown": "...", "bullets": ["..."], "evidence": [...]},
-    {"id": "credibility_signals", "title": "Credibility Signals & Evidence Gaps", "markdown": "...", "bullets": ["..."], "evidence": [...]},
-    {"id": "sbti_benchmark", "title": "Deterministic SBTi Benchmark", "markdown": "...", "bullets": ["..."], "evidence": [...]}
-]"""
 
+class AnalysisAgents(BaseAgent):
+    """
+    Tier 4: Analysis & Synthesis.
+    Proprietary risk modeling and report synthesis.
+    """
+    
+    def _create_fallback_memo(self, error_msg: str) -> dict:
+        """Create a fallback credit memo when AI generation fails."""
+        memo = copy.deepcopy(_FALLBACK_MEMO_TEMPLATE)
+        memo["meta"]["as_of_date"] = _today()
+        memo["meta"]["error"] = error_msg
+        summary = memo["sections"][0]
+        summary["markdown"] = f"### Generation Error\n\nThe credit memo could not be generated automatically due to: {error_msg}.\n\nPlease review the raw data and individual agent outputs for the assessment."
+        summary["bullets"][-1] = f"Error: {error_msg}"
+        return memo
+    
+    async def _gather_memory(self, categories: List[str]) -> Dict[str, List[Dict]]:
+        """Retrieve several categories with one batched search, as a category -> memories map."""
+        return await self.memory.retrieve_memory_multi(query=_ANALYSIS_MEMORY_QUERY, categories=categories)
+
+    async def run_all(self):
+        """
+        Run the three independent analysis passes concurrently.
+        Memory for the union of their categories is retrieved once and shared.
+        Returns (achievability, synthesis, visuals); a failed pass is returned as its exception.
+        """
+        categories = list(dict.fromkeys(_ACHIEVABILITY_CATEGORIES + _SYNTHESIS_CATEGORIES + _VISUALS_CATEGORIES))
+        try:
+            preloaded = await self._gather_memory(categories)
+        except Exception as e:
+            logging.warning(f"{self.name}: Shared memory preload failed, passes will retrieve individually: {e}")
+            preloaded = None
+        return await asyncio.gather(
+            self.assess_achievability(preloaded=preloaded),
+            self.synthesize_evidence(preloaded=preloaded),
+            self.generate_visual_json(preloaded=preloaded),
+            return_exceptions=True,
+        )
+
+    async def assess_achievability(self, preloaded: Optional[Dict[str, List[Dict]]] = None):
+        logging.info(f"{self.name}: Assessing Achievability & Risk.")
+        task = _TASK_ACHIEVABILITY
+        categories = _ACHIEVABILITY_CATEGORIES
+        memory_context = await self.build_memory_context(task, categories, preloaded=preloaded)
+        cached, cache_state = await analysis_cache.get("achievability", self.company_id, memory_context)
+        if cached is not None:
+            await self.remember("analysis", "achievability", cached, defer_remote=True)
+            return cached
+        
+        res = await self.think_with_memory(task, categories, memory_context=memory_context)
+        
+        data = self.parse_json_robust(res, "achievability")
+        
+        if is_valid(validate_achievability, data, "achievability"):
+            analysis_cache.put("achievability", self.company_id, cache_state, data)
+            await self.remember("analysis", "achievability", data, defer_remote=True)
+            return data
+        else:
+            logging.error(f"Tier4 achievability failed: Could not parse response. Preview: {res[:300] if res else 'Empty'}")
+            # Return a safe fallback instead of crashing
+            return {
+                "score": 0,
+                "credibility_level": "LOW",
+                "signals": {},
+                "top_risks": [],
+                "reasoning": "Assessment failed due to AI provider error.",
+                "evidence": []
+            }
+
+    async def synthesize_evidence(self, preloaded: Optional[Dict[str, List[Dict]]] = None):
+        logging.info(f"{self.name}: Synthesizing Evidence.")
+        task = _TASK_SYNTHESIS
+        categories = _SYNTHESIS_CATEGORIES
+        memory_context = await self.build_memory_context(task, categories, preloaded=preloaded)
+        cached, cache_state = await analysis_cache.get("synthesis", self.company_id, memory_context)
+        if cached is not None:
+            await self.remember("analysis", "synthesis", cached, defer_remote=True)
+            return cached
+        
+        res = await self.think_with_memory(task, categories, memory_context=memory_context)
+        
+        data = self.parse_json_robust(res, "synthesize_evidence")
+        
+        if is_valid(validate_synthesis, data, "synthesize_evidence"):
+            analysis_cache.put("synthesis", self.company_id, cache_state, data)
+            await self.remember("analysis", "synthesis", data, defer_remote=True)
+            return data
+        else:
+            logging.error(f"Tier4 synthesis failed: Could not parse response. Preview: {res[:300] if res else 'Empty'}")
+            return {
+                "narrative": "Error generating synthesis narrative due to AI provider failure.",
+                "evidence": []
+            }
+
+    async def generate_visual_json(self, preloaded: Optional[Dict[str, List[Dict]]] = None):
+        # Generates structure for Frontend Charts (e.g. Recharts)
+        logging.info(f"{self.name}: Generating Visual Chart Data.")
+
+        task = _TASK_VISUALS
+        categories = _VISUALS_CATEGORIES
+        memory_context = await self.build_memory_context(task, categories, preloaded=preloaded)
+        cached, cache_state = await analysis_cache.get("visuals", self.company_id, memory_context)
+        if cached is not None:
+            await self.remember("analysis", "visuals", cached, defer_remote=True)
+            return cached
+        
+        res = await self.think_with_memory(task, categories, memory_context=memory_context)
+        
+        data = self.parse_json_robust(res, "generate_visual_json")
+        
+        if is_valid(validate_visuals, data, "generate_visual_json"):
+            analysis_cache.put("visuals", self.company_id, cache_state, data)
+            await self.remember("analysis", "visuals", data, defer_remote=True)
+            return data
+        else:
+            logging.error(f"Tier4 visuals failed: Could not parse response. Preview: {res[:300] if res else 'Empty'}")
+            return {
+                "peer_comparison": {
+                    "labels": ["Error"], 
+                    "dataset": [{"label": "Reduction %", "data": [0]}]
+                },
+                "emissions_trajectory": {
+                    "labels": ["Error"],
+                    "data": [0]
+                }
+            }
+
+    async def _summarize_memory_context(self, memory_context: str) -> str:
+        """
+        Condense a large memory context with a cheap model before it is copied into
+        every section prompt. Summaries are cached by content hash; on any failure
+        the raw context is returned unchanged.
+        """
+        if len(memory_context) <= MEMORY_SUMMARY_THRESHOLD_CHARS:
+            return memory_context
+
+        digest = hashlib.sha256(memory_context.encode("utf-8")).hexdigest()
+        cached = _memory_summaries.get(digest)
+        if cached is not None:
+            _memory_summaries.move_to_end(digest)
+            return cached
+
+        summarizer = None
+        if _GEMINI_API_KEY:
+            try:
+                summarizer = _get_gemini_client("summary", max_output_tokens=3500)
+            except Exception as e:
+                logging.warning(f"{self.name}: Summarizer init failed: {e}")
+        summarizer = summarizer or self._openrouter_client
+        if summarizer is None:
+            return memory_context
+
+        try:
+            response = await asyncio.wait_for(
+                summarizer.ainvoke([HumanMessage(content=_MEMORY_SUMMARY_PROMPT + memory_context)]),
+                timeout=MEMORY_SUMMARY_TIMEOUT_SECONDS
+            )
+            summary = (response.content or "").strip()
+        except Exception as e:
+            logging.warning(f"{self.name}: Memory summarization failed, using raw context: {e}")
+            return memory_context
+
+        if not summary or len(summary) >= len(memory_context):
+            return memory_context
+
+        logging.info(f"{self.name}: Memory context summarized {len(memory_context)} -> {len(summary)} chars")
+        _memory_summaries[digest] = summary
+        while len(_memory_summaries) > _MEMORY_SUMMARY_CACHE_SIZE:
+            _memory_summaries.popitem(last=False)
+        return summary
+
+    @staticmethod
+    async def draft_credit_memo_batch(agents: List["AnalysisAgents"], concurrency: int = 16, **kwargs) -> List[Any]:
+        """
+        Draft credit memos for a portfolio of borrowers concurrently.
+        Each agent carries one borrower's company_id and memory store; at most
+        `concurrency` memos are in flight at once. Returns one memo per agent, in
+        order, with a failed borrower returned as its exception.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def draft_one(agent: "AnalysisAgents"):
+            async with semaphore:
+                return await agent.draft_credit_memo(**kwargs)
+
+        return await asyncio.gather(*(draft_one(agent) for agent in agents), return_exceptions=True)
+
+    async def draft_credit_memo(self, speculative: bool = False, hedge: bool = False):
+        """
+        Generate a credit memo using the base agent's robust fallback chain.
+        Executes sections in parallel using the configured unified LLM logic.
+        With speculative=True each section is raced on two models and the
+        slower call is cancelled, trading extra tokens for lower tail latency.
+        With hedge=True (opt-in, like speculative) Gemini Flash drafts every
+        section alongside its premium writer; the premium result wins if it is
+        valid within SECTION_PREMIUM_SLA_SECONDS, otherwise the cheap draft is used.
+        """
+        logging.info(f"{self.name}: Starting Credit Memo Generation via Unified LLM Logic")
+        
+        # Gather memory context
+        context_parts = []
+        serialized_memories: Dict[int, str] = {}
+        categories = ["banker_input", "target", "benchmark", "regulatory", "analysis", "achievement", "raw_extraction", "document_metadata"]
+        memories_by_category = await self.memory.retrieve_memory_multi(query="credit memo generation", categories=categories)
+        for category in categories:
+            memories = memories_by_category.get(category)
+            if memories:
+                context_parts.append(f"\n[{category.upper()}]:\n")
+                for mem in memories:
+                    context_parts.append(f"- {_serialize_memory(mem, serialized_memories)}\n")
+        memory_context = "".join(context_parts)
+        
+        cached_memo, memo_cache_state = await analysis_cache.get("credit_memo", self.company_id, memory_context)
+        if cached_memo is not None:
+            cached_memo.setdefault("meta", {})["as_of_date"] = _today()
+            await self.remember("analysis", "credit_memo", cached_memo, defer_remote=True)
+            return cached_memo
+        
         # Initialize all model clients and exhaustion flags
-        from app.config import settings
         from app.agents.base_agent import _bytez_exhausted, _openrouter_exhausted
         
         # Alias variables for cleaner code
@@ -730,23 +1167,10 @@ Return STRICT JSON only:
         _bytez_credit_exhausted = _bytez_exhausted
         _bytez_qwen_exhausted = _bytez_exhausted  # Same flag for both Bytez models
         
-        # Alias task variables
-        task_qwen = task_strategic
-        task_gemini = task_analytical
-        task_kimi = task_data
-        
-        # Base system prompt for all models
-        base_system = f"""You are an expert ESG banking analyst generating a credit memo.
-        
-MEMORY CONTEXT:
-{memory_context}
-
-CRITICAL RULES:
-- Return STRICT JSON only - no markdown, no commentary
-- Use only facts from the memory context above
-- If information is missing, write "Not evidenced"
-- Be professional and bank-grade in your analysis
-"""
+        # Static rules first, memory last: byte-identical prefixes let providers
+        # with automatic prompt caching reuse them across the parallel section calls
+        prompt_context = await self._summarize_memory_context(memory_context)
+        base_system = "\n".join([CREDIT_MEMO_SYSTEM_STATIC, SECTION_SCHEMA_PROMPT, "MEMORY CONTEXT:", prompt_context, ""])
         
         # Initialize LangChain model clients
         model_kimi = None
@@ -756,54 +1180,112 @@ CRITICAL RULES:
         
         # Try to initialize Gemini if Google API key is available
         try:
-            google_api_key = os.getenv("GOOGLE_API_KEY")
-            if google_api_key:
-                model_gemini = ChatGoogleGenerativeAI(
-                    model="gemini-2.0-flash",
-                    google_api_key=google_api_key,
-                    temperature=0
-                )
+            if _GEMINI_API_KEY:
+                # JSON mode: the model can only emit a JSON document, so sections
+                # parse on the fast path without repair or retry
+                model_gemini = _get_gemini_client("sections", response_mime_type="application/json")
         except Exception as e:
             logging.warning(f"{self.name}: Gemini init failed: {e}")
         
-        async def call_langchain_model(model, task, model_name):
-            """Call a LangChain model with timeout and error handling."""
-            try:
-                logging.info(f"{self.name}: Calling {model_name} for section generation...")
-                messages = [
-                    SystemMessage(content=base_system),
-                    HumanMessage(content=task)
-                ]
-                response = await asyncio.wait_for(
-                    model.ainvoke(messages),
-                    timeout=180  # 3 minute timeout per model
-                )
-                logging.info(f"{self.name}: {model_name} responded with {len(response.content)} chars")
-                return self.parse_json_robust(response.content, f"{model_name}_sections")
-            except asyncio.TimeoutError:
-                logging.error(f"{self.name}: {model_name} timed out")
-                return []
-            except Exception as e:
-                logging.error(f"{self.name}: {model_name} failed: {e}")
-                return []
+        async def call_langchain_model(model, task, model_name, idle_timeout=SECTION_IDLE_TIMEOUT_SECONDS):
+            """
+            Stream a LangChain model with an idle watchdog.
+            Aborts only when no chunk arrives for `idle_timeout` seconds and always
+            parses whatever partial output was received instead of discarding it.
+            Stops reading as soon as the section's JSON object closes.
+            """
+            cache_key = _section_cache_key(getattr(model, "model_name", None) or model_name, base_system, task)
+            cached = _get_cached_section(cache_key)
+            if cached is not None:
+                logging.info(f"{self.name}: {model_name} served from exact-match cache")
+                return cached
+
+            chunks = []
+            usage = None
+            complete = False
+            tracker = _JsonObjectTracker()
+            messages = [
+                SystemMessage(content=base_system),
+                HumanMessage(content=task)
+            ]
+            deadline = time.monotonic() + SECTION_CALL_BUDGET_SECONDS
+            for attempt in range(1, RATE_LIMIT_MAX_ATTEMPTS + 1):
+                try:
+                    logging.info(f"{self.name}: Calling {model_name} for section generation...")
+                    stream = model.astream(messages)
+                    try:
+                        while True:
+                            try:
+                                chunk = await asyncio.wait_for(stream.__anext__(), timeout=idle_timeout)
+                            except StopAsyncIteration:
+                                complete = True
+                                break
+                            except asyncio.TimeoutError:
+                                logging.warning(f"{self.name}: {model_name} idle for >{idle_timeout}s, keeping partial output")
+                                break
+                            if getattr(chunk, "usage_metadata", None):
+                                usage = chunk.usage_metadata
+                            if chunk.content:
+                                chunks.append(chunk.content)
+                                if tracker.feed(chunk.content):
+                                    complete = True
+                                    logging.info(f"{self.name}: {model_name} closed its JSON object, ending stream early")
+                                    break
+                    finally:
+                        await stream.aclose()
+                    break
+                except Exception as e:
+                    # A 429 before any output is retried within the call budget
+                    delay = rate_limit_backoff(attempt)
+                    if (not chunks and is_rate_limited(e) and attempt < RATE_LIMIT_MAX_ATTEMPTS
+                            and time.monotonic() + delay < deadline):
+                        logging.warning(f"{self.name}: {model_name} rate limited, retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    logging.error(f"{self.name}: {model_name} failed: {e}")
+                    if not chunks:
+                        return []
+                    break
+
+            content = "".join(chunks)
+            logging.info(f"{self.name}: {model_name} responded with {len(content)} chars")
+            if usage:
+                cache_read = (usage.get("input_token_details") or {}).get("cache_read", 0)
+                logging.info(f"{self.name}: {model_name} input tokens: {usage.get('input_tokens', 0)} (cache_read_input_tokens: {cache_read})")
+            parsed = self.parse_json_robust(content, f"{model_name}_sections")
+            if complete:
+                # Never memoize output salvaged from an idle-aborted or failed stream
+                _put_cached_section(cache_key, parsed)
+            return parsed
 
         async def call_bytez_model(bytez_client, model_id, task, model_name):
             """Call a Bytez model with timeout and error handling."""
+            cache_key = _section_cache_key(model_id, base_system, task)
+            cached = _get_cached_section(cache_key)
+            if cached is not None:
+                logging.info(f"{self.name}: {model_name} served from exact-match cache")
+                return cached
+
             try:
                 logging.info(f"{self.name}: Calling {model_name} via Bytez for section generation...")
-                model = bytez_client.model(model_id)
+                model = get_bytez_model(bytez_client, model_id)
                 bytez_messages = [
                     {"role": "system", "content": base_system},
                     {"role": "user", "content": task}
                 ]
                 
-                # Run in executor to avoid blocking
-                loop = asyncio.get_event_loop()
-                with concurrent.futures.ThreadPoolExecutor() as pool:
+                deadline = time.monotonic() + SECTION_CALL_BUDGET_SECONDS
+                for attempt in range(1, RATE_LIMIT_MAX_ATTEMPTS + 1):
                     results = await asyncio.wait_for(
-                        loop.run_in_executor(pool, lambda: model.run(bytez_messages)),
-                        timeout=180
+                        run_bytez(model, bytez_messages), timeout=max(1.0, deadline - time.monotonic())
                     )
+                    if not results.error or not is_rate_limited(results.error) or attempt == RATE_LIMIT_MAX_ATTEMPTS:
+                        break
+                    delay = rate_limit_backoff(attempt)
+                    if time.monotonic() + delay >= deadline:
+                        break
+                    logging.warning(f"{self.name}: {model_name} rate limited, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
                 
                 if results.error:
                     raise ValueError(f"Bytez Error: {results.error}")
@@ -837,7 +1319,9 @@ CRITICAL RULES:
                     content = str(output)
                 
                 logging.info(f"{self.name}: {model_name} responded with {len(content)} chars")
-                return self.parse_json_robust(content, f"{model_name}_sections")
+                parsed = self.parse_json_robust(content, f"{model_name}_sections")
+                _put_cached_section(cache_key, parsed)
+                return parsed
             except asyncio.TimeoutError:
                 logging.error(f"{self.name}: {model_name} timed out")
                 return []
@@ -845,91 +1329,175 @@ CRITICAL RULES:
                 logging.error(f"{self.name}: {model_name} failed: {e}")
                 return []
 
+        async def race_first_valid(candidates):
+            """Run the same section on several models and keep the first non-empty result."""
+            pending = {asyncio.ensure_future(c) for c in candidates}
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        if not finished.cancelled() and finished.exception() is None and finished.result():
+                            return finished.result()
+                return []
+            finally:
+                for loser in pending:
+                    loser.cancel()
+
+        def section_ok(result) -> bool:
+            sections = [result] if isinstance(result, dict) else result if isinstance(result, list) else []
+            return any(is_valid(validate_credit_memo_section, sec, "hedge") for sec in sections)
+
+        async def hedge_with_cheap(premium, cheap, sla=SECTION_PREMIUM_SLA_SECONDS):
+            """Prefer the premium result; fall back to the cheap draft on failure or SLA breach."""
+            premium_task = asyncio.ensure_future(premium)
+            cheap_task = asyncio.ensure_future(cheap)
+            try:
+                done, _ = await asyncio.wait({premium_task}, timeout=sla)
+                if done and premium_task.exception() is None and section_ok(premium_task.result()):
+                    return premium_task.result()
+                # Premium failed, returned junk or is over SLA: take the cheap draft if it is valid
+                cheap_result = await asyncio.gather(cheap_task, return_exceptions=True)
+                if section_ok(cheap_result[0]):
+                    return cheap_result[0]
+                if not done:
+                    premium_result = await asyncio.gather(premium_task, return_exceptions=True)
+                    return premium_result[0] if not isinstance(premium_result[0], Exception) else []
+                return []
+            finally:
+                for task in (premium_task, cheap_task):
+                    if not task.done():
+                        task.cancel()
+
         # Run models in PARALLEL - use whatever is available
         logging.info(f"{self.name}: Launching parallel LLM calls...")
         
-        tasks = []
-        model_names = []
-        
-        # Determine which models to use based on availability
-        # Priority: Bytez > OpenRouter > Gemini > DeepSeek > Perplexity
-        
-        # Task 1: Executive Summary (use best available model)
+        # Available section writers in priority order: Bytez > Kimi > Perplexity > Gemini > Llama
+        writers = []
         if bytez_client and not _bytez_credit_exhausted:
-            tasks.append(call_bytez_model(bytez_client, "google/gemini-2.5-pro", task_qwen, "Bytez-Gemini-2.5-Pro"))
-            model_names.append("Bytez-Gemini-2.5-Pro")
-        elif model_kimi:
-            tasks.append(call_langchain_model(model_kimi, task_qwen, "Kimi-Chat"))
-            model_names.append("Kimi-Chat")
-        elif model_perplexity:
-            tasks.append(call_langchain_model(model_perplexity, task_qwen, "Perplexity-Sonar"))
-            model_names.append("Perplexity-Sonar")
-        elif model_llama:
-            tasks.append(call_langchain_model(model_llama, task_qwen, "Llama-3.3-70B"))
-            model_names.append("Llama-3.3-70B")
-        
-        # Task 2: Benchmarking Analysis (use secondary model)
+            writers.append(("Bytez-Gemini-2.5-Pro", lambda task, name: call_bytez_model(bytez_client, "google/gemini-2.5-pro", task, name)))
         if bytez_client and not _bytez_qwen_exhausted:
-            tasks.append(call_bytez_model(bytez_client, "Qwen/Qwen3-Coder-30B-A3B-Instruct", task_gemini, "Bytez-Qwen3-Coder"))
-            model_names.append("Bytez-Qwen3-Coder")
-        elif model_kimi:
-            tasks.append(call_langchain_model(model_kimi, task_gemini, "Kimi-Bench"))
-            model_names.append("Kimi-Bench")
-        elif model_perplexity:
-            tasks.append(call_langchain_model(model_perplexity, task_gemini, "Perplexity-Bench"))
-            model_names.append("Perplexity-Bench")
-        elif model_gemini:
-            tasks.append(call_langchain_model(model_gemini, task_gemini, "Gemini-2.0-Flash"))
-            model_names.append("Gemini-2.0-Flash")
-        elif model_llama:
-            tasks.append(call_langchain_model(model_llama, task_gemini, "Llama-3.3-70B-Bench"))
-            model_names.append("Llama-3.3-70B-Bench")
-        
-        # Task 3: Data Extraction (use third model or reuse)
-        if model_kimi and "Kimi" not in str(model_names):
-            tasks.append(call_langchain_model(model_kimi, task_kimi, "Kimi-Data"))
-            model_names.append("Kimi-Data")
-        elif model_perplexity and "Perplexity" not in str(model_names):
-            tasks.append(call_langchain_model(model_perplexity, task_kimi, "Perplexity-Data"))
-            model_names.append("Perplexity-Data")
-        elif model_llama:
-            tasks.append(call_langchain_model(model_llama, task_kimi, "Llama-3.3-70B-Data"))
-            model_names.append("Llama-3.3-70B-Data")
-        elif bytez_client:
-            tasks.append(call_bytez_model(bytez_client, "Qwen/Qwen3-Coder-30B-A3B-Instruct", task_kimi, "Bytez-Qwen3-Data"))
-            model_names.append("Bytez-Qwen3-Data")
+            writers.append(("Bytez-Qwen3-Coder", lambda task, name: call_bytez_model(bytez_client, "Qwen/Qwen3-Coder-30B-A3B-Instruct", task, name)))
+        if model_kimi:
+            writers.append(("Kimi", lambda task, name: call_langchain_model(model_kimi, task, name)))
+        if model_perplexity:
+            writers.append(("Perplexity-Sonar", lambda task, name: call_langchain_model(model_perplexity, task, name)))
+        if model_gemini:
+            writers.append(("Gemini-2.0-Flash", lambda task, name: call_langchain_model(model_gemini, task, name)))
+        if model_llama:
+            writers.append(("Llama-3.3-70B", lambda task, name: call_langchain_model(model_llama, task, name)))
         
-        if not tasks:
+        if not writers:
             logging.error(f"{self.name}: No models available for credit memo generation!")
             # Return fallback memo
             return self._create_fallback_memo("No AI models available - all providers exhausted")
         
+        def plan_section(i: int, sec_id: str, sec_task: str):
+            """Return (call_name, factory) for one section's writer call."""
+            writer_name, run_writer = writers[i % len(writers)]
+            call_name = f"{writer_name}-{sec_id}"
+            backup = writers[(i + 1) % len(writers)] if speculative and len(writers) > 1 else None
+            hedged = hedge and model_gemini and not writer_name.startswith("Gemini")
+
+            def factory():
+                if backup:
+                    # Also race the section on the next writer and cancel whichever finishes last
+                    call = race_first_valid([
+                        run_writer(sec_task, call_name),
+                        backup[1](sec_task, f"{backup[0]}-{sec_id}"),
+                    ])
+                else:
+                    call = run_writer(sec_task, call_name)
+                if hedged:
+                    call = hedge_with_cheap(
+                        call,
+                        call_langchain_model(model_gemini, sec_task, f"Gemini-2.0-Flash-{sec_id}-hedge"),
+                    )
+                return call
+
+            if backup:
+                call_name = f"{call_name}|{backup[0]}"
+            if hedged:
+                call_name = f"{call_name}~Gemini-2.0-Flash"
+            return call_name, factory
+
+        async def write_section(sec_id: str, sec_task: str, call_name: str, factory):
+            """Serve a section from the semantic cache, or generate and cache it."""
+            # Keyed on the planned writers and the prompt, so a section drafted by
+            # one model never answers for another
+            task_key = f"section:{sec_id}:{_section_cache_key(call_name, base_system_static, sec_task).hex()}"
+            cached = section_cache.lookup(task_key, self.company_id, section_cache_state)
+            if cached is not None:
+                return cached
+            result = await factory()
+            if section_ok(result):
+                section_cache.put(task_key, self.company_id, section_cache_state, result)
+            return result
+
+        # Normalize and embed the shared context once instead of once per section
+        base_system_static = "\n".join([CREDIT_MEMO_SYSTEM_STATIC, SECTION_SCHEMA_PROMPT])
+        section_cache_state = await section_cache.prepare(prompt_context)
+
+        # Round-robin the sections over the available writers so a missing
+        # provider never drops its sections - the remaining models cover them.
+        tasks = []
+        model_names = []
+        for i, (sec_id, sec_task) in enumerate(_CREDIT_MEMO_SECTION_TASKS):
+            call_name, factory = plan_section(i, sec_id, sec_task)
+            tasks.append(write_section(sec_id, sec_task, call_name, factory))
+            model_names.append(call_name)
+        
         logging.info(f"{self.name}: Using models: {model_names}")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await _gather_with_quorum(tasks, section_ok, MEMO_SECTION_QUORUM, MEMO_STRAGGLER_GRACE_SECONDS)
         
-        # Aggregate all sections
-        all_sections = []
+        # Aggregate sections keyed by id (first occurrence wins) for O(1) lookups;
+        # only the sections that are kept get trimmed
+        sections_by_id: Dict[str, dict] = {}
         for i, result in enumerate(results):
+            if isinstance(result, dict):
+                result = [result]
             if isinstance(result, list):
-                all_sections.extend(result)
+                for section in result:
+                    if not is_valid(validate_credit_memo_section, section, model_names[i] if i < len(model_names) else "section"):
+                        continue
+                    if section["id"] not in sections_by_id:
+                        _trim_section(section)
+                        sections_by_id[section["id"]] = section
                 logging.info(f"{self.name}: {model_names[i] if i < len(model_names) else f'Model {i+1}'} contributed {len(result)} sections")
             elif isinstance(result, Exception):
                 logging.error(f"{self.name}: {model_names[i] if i < len(model_names) else f'Model {i+1}'} raised exception: {result}")
         
-        # Deduplicate sections by ID (keep first occurrence)
-        unique_sections = []
-        seen_ids = set()
-        for section in all_sections:
-            sec_id = section.get("id")
-            if sec_id and sec_id not in seen_ids:
-                unique_sections.append(section)
-                seen_ids.add(sec_id)
-        
-        all_sections = unique_sections
-        logging.info(f"{self.name}: Total sections aggregated (deduplicated): {len(all_sections)}")
+        # Sections cancelled after quorum or failed outright get one pass on the
+        # cheap model, bounded by the premium SLA
+        missing = [(sec_id, sec_task) for sec_id, sec_task in _CREDIT_MEMO_SECTION_TASKS if sec_id not in sections_by_id]
+        if missing and model_gemini:
+            logging.info(f"{self.name}: Retrying {len(missing)} missing section(s) on Gemini-2.0-Flash")
+            retries = await asyncio.gather(*(
+                asyncio.wait_for(
+                    call_langchain_model(model_gemini, sec_task, f"Gemini-2.0-Flash-{sec_id}-retry"),
+                    timeout=SECTION_PREMIUM_SLA_SECONDS,
+                )
+                for sec_id, sec_task in missing
+            ), return_exceptions=True)
+            for result in retries:
+                if isinstance(result, dict):
+                    result = [result]
+                if not isinstance(result, list):
+                    continue
+                for section in result:
+                    if is_valid(validate_credit_memo_section, section, "retry") and section["id"] not in sections_by_id:
+                        _trim_section(section)
+                        sections_by_id[section["id"]] = section
+
+        # Keep the memo's section order and fill any remaining gaps with placeholders
+        all_sections = [
+            sections_by_id[sec_id] if sec_id in sections_by_id else _build_missing_section(sec_id, title)
+            for sec_id, title, _ in _CREDIT_MEMO_SECTION_SPECS
+        ] if sections_by_id else []
+        all_sections.extend(sec for sec_id, sec in sections_by_id.items() if sec_id not in _CREDIT_MEMO_SECTION_IDS)
+        logging.info(f"{self.name}: Total sections aggregated (deduplicated): {len(sections_by_id)}")
         
         # Build final credit memo structure
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = _today()
         
         # Extract company info from memory
         company_name = "Unknown Company"
@@ -938,46 +1506,24 @@ CRITICAL RULES:
         baseline_year = 0
         target_year = 0
         
-        try:
-            banker_input = await self.memory.retrieve_memory("company target", "banker_input")
-            if banker_input:
-                for mem in banker_input:
-                    if isinstance(mem, dict):
-                        company_name = mem.get("company_name", company_name)
-                        industry_sector = mem.get("industry_sector", industry_sector)
-                        target_value = mem.get("target_value", target_value)
-                        baseline_year = mem.get("baseline_year", baseline_year)
-                        target_year = mem.get("timeline_end_year", target_year)
-        except:
-            pass
+        # Reuse the banker_input memories fetched for the prompt context above
+        # instead of issuing another memory search
+        for mem in memories_by_category.get("banker_input") or []:
+            if not isinstance(mem, dict):
+                continue
+            # Stored facts nest the submission under "value"
+            fields = mem.get("value") if isinstance(mem.get("value"), dict) else mem
+            company_name = fields.get("company_name", company_name)
+            industry_sector = fields.get("industry_sector", industry_sector)
+            target_value = fields.get("target_value", target_value)
+            baseline_year = fields.get("baseline_year", baseline_year)
+            target_year = fields.get("timeline_end_year", target_year)
         
         # Build figures from visuals memory
-        figures = [
-            {
-                "id": "fig_peer_comparison",
-                "title": "Peer Benchmarking (Reduction Target vs Peers)",
-                "type": "bar",
-                "data": {"labels": ["Company Target", "Peer Median", "Top Quartile"], "dataset": [{"label": "Reduction %", "data": [target_value, 5.0, 7.0]}]}
-            },
-            {
-                "id": "fig_trajectory",
-                "title": "Emissions Trajectory (Indexed to Baseline)",
-                "type": "line",
-                "data": {"labels": [str(baseline_year), str((baseline_year + target_year) // 2), str(target_year)], "data": [100, 100 - target_value/2, 100 - target_value]}
-            }
-        ]
+        figures = _build_figures(target_value, baseline_year, target_year)
         
         # Build risk register from risks section
-        risk_register = []
-        for section in all_sections:
-            if section.get("id") == "risks":
-                # Parse risks from markdown
-                risk_register = [
-                    {"id": "R1", "severity": "MEDIUM", "theme": "Execution", "description": "Target achievement depends on successful implementation of transition plan", "mitigant": "Regular progress reporting", "covenant_or_condition": "Quarterly sustainability reports", "evidence": []},
-                    {"id": "R2", "severity": "LOW", "theme": "Data", "description": "Emissions data quality and methodology consistency", "mitigant": "Third-party verification", "covenant_or_condition": "Annual audit of emissions data", "evidence": []},
-                    {"id": "R3", "severity": "LOW", "theme": "Regulatory", "description": "Changing regulatory requirements", "mitigant": "Flexible covenant structure", "covenant_or_condition": "Methodology update clause", "evidence": []}
-                ]
-                break
+        risk_register = _build_risk_register() if "risks" in sections_by_id else []
         
         credit_memo = {
             "meta": {
@@ -1009,28 +1555,19 @@ CRITICAL RULES:
                 "evidence_gaps": [],
                 "confidence": "MEDIUM"
             },
-            "sections": all_sections if all_sections else [
-                {
-                    "id": "executive_summary",
-                    "title": "Executive Summary",
-                    "markdown": "### Multi-Model Generation\n\nThe distributed credit memo generation encountered issues. Please review individual agent outputs.",
-                    "bullets": ["Multi-model approach used", "Some sections may be incomplete"],
-                    "evidence": []
-                }
-            ],
+            "sections": all_sections if all_sections else _build_empty_memo_sections(),
             "figures": figures,
             "risk_register": risk_register,
-            "recommended_terms": {
-                "decision": "CONDITIONAL_APPROVAL",
-                "conditions": ["Annual sustainability report submission", "Third-party verification of emissions", "Board oversight confirmation"],
-                "monitoring_plan": ["Quarterly progress updates", "Annual KPI verification", "Mid-term target review"],
-                "covenants": ["Information covenant: Annual ESG reporting", "Performance covenant: On-track to meet interim targets"]
-            }
+            "recommended_terms": _build_recommended_terms()
         }
         
         logging.info(f"{self.name}: Credit memo assembled with {len(all_sections)} sections")
         
-        await self.remember("analysis", "credit_memo", credit_memo)
+        # Only a memo with every section is reusable; a partial one would be
+        # served for a day after the failing provider has recovered
+        if all(sec_id in sections_by_id for sec_id, _ in _CREDIT_MEMO_SECTION_TASKS):
+            analysis_cache.put("credit_memo", self.company_id, memo_cache_state, credit_memo)
+        await self.remember("analysis", "credit_memo", credit_memo, defer_remote=True)
         logging.info(f"{self.name}: Credit memo stored in memory")
         
         return credit_memo
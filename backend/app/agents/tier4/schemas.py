@@ -0,0 +1,131 @@
+"""
+Compiled JSON Schema validators for Tier 4 LLM outputs.
+
+fastjsonschema generates specialized Python code per schema at import time.
+When it is not installed, a minimal validator checks top-level required keys
+and property types so the agents behave the same, only slower.
+"""
+import logging
+from typing import Any, Callable, Dict
+
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+    logging.warning("fastjsonschema not found. Tier 4 outputs will use basic key/type validation.")
+
+
+class SchemaValidationError(ValueError):
+    """Raised when an LLM output does not match its schema."""
+
+
+_JSON_TYPES: Dict[str, tuple] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+}
+
+
+def _type_ok(value: Any, json_type: str) -> bool:
+    if json_type in ("number", "integer") and isinstance(value, bool):
+        return False
+    return isinstance(value, _JSON_TYPES.get(json_type, (object,)))
+
+
+def _basic_validator(schema: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Fallback: top-level type, required, anyOf-required and property types only."""
+    def validate(data: Any) -> Any:
+        if not _type_ok(data, schema.get("type", "object")):
+            raise SchemaValidationError(f"data must be {schema.get('type', 'object')}")
+        for key in schema.get("required", []):
+            if key not in data:
+                raise SchemaValidationError(f"data must contain ['{key}'] property")
+        any_of = schema.get("anyOf")
+        if any_of and not any(all(k in data for k in branch.get("required", [])) for branch in any_of):
+            raise SchemaValidationError("data must match any of the required property sets")
+        for key, prop in schema.get("properties", {}).items():
+            if key in data and "type" in prop and not _type_ok(data[key], prop["type"]):
+                raise SchemaValidationError(f"data.{key} must be {prop['type']}")
+        return data
+    return validate
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Compile a schema into a validator that raises SchemaValidationError on mismatch."""
+    if not FASTJSONSCHEMA_AVAILABLE:
+        return _basic_validator(schema)
+
+    compiled = fastjsonschema.compile(schema)
+
+    def validate(data: Any) -> Any:
+        try:
+            return compiled(data)
+        except fastjsonschema.JsonSchemaException as e:
+            raise SchemaValidationError(str(e)) from e
+    return validate
+
+
+def is_valid(validator: Callable[[Any], Any], data: Any, context: str = "unknown") -> bool:
+    """Run a validator, logging the violation instead of raising."""
+    try:
+        validator(data)
+        return True
+    except SchemaValidationError as e:
+        logging.warning(f"[{context}] Schema validation failed: {e}")
+        return False
+
+
+ACHIEVABILITY_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["score"],
+    "properties": {
+        "score": {"type": "number"},
+        "credibility_level": {"type": "string"},
+        "signals": {"type": "object"},
+        "top_risks": {"type": "array"},
+        "reasoning": {"type": "string"},
+        "evidence": {"type": "array"},
+    },
+}
+
+SYNTHESIS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["narrative"],
+    "properties": {
+        "narrative": {"type": "string"},
+        "evidence": {"type": "array"},
+    },
+}
+
+VISUALS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "anyOf": [
+        {"required": ["peer_comparison"]},
+        {"required": ["emissions_trajectory"]},
+    ],
+    "properties": {
+        "peer_comparison": {"type": "object"},
+        "emissions_trajectory": {"type": "object"},
+    },
+}
+
+CREDIT_MEMO_SECTION_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["id", "title", "markdown"],
+    "properties": {
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "markdown": {"type": "string"},
+        "bullets": {"type": "array"},
+        "evidence": {"type": "array"},
+    },
+}
+
+validate_achievability = compile_schema(ACHIEVABILITY_SCHEMA)
+validate_synthesis = compile_schema(SYNTHESIS_SCHEMA)
+validate_visuals = compile_schema(VISUALS_SCHEMA)
+validate_credit_memo_section = compile_schema(CREDIT_MEMO_SECTION_SCHEMA)
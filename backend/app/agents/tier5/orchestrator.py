@@ -1,12 +1,27 @@
 import logging
+import asyncio
 import json
-import re
+import orjson
 from typing import Dict, Any, List
 
 from app.core.memory_store import MemoryStore
 from app.agents.tier1.document_processor import DocumentProcessorAgent
 from app.agents.tier3.benchmark_agent import BenchmarkAgent
-from app.agents.base_agent import BaseAgent
+from app.agents.base_agent import BaseAgent, _find_first_json_object, _json_loads
+
+# Memory categories read by the final decision prompt (and its repair retry)
+_DECISION_CATEGORIES = ["benchmark", "analysis", "regulatory"]
+# Per-block cap on the agent results inlined into the decision prompt (~3k tokens each)
+DECISION_BLOCK_MAX_CHARS = 12000
+
+
+def _dump_decision_block(value: Any) -> str:
+    """Serialize one agent result for the decision prompt, truncated to DECISION_BLOCK_MAX_CHARS."""
+    text = orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    if len(text) > DECISION_BLOCK_MAX_CHARS:
+        return text[:DECISION_BLOCK_MAX_CHARS] + "... (truncated)"
+    return text
+
 
 class OrchestratorAgent(BaseAgent):
     """
@@ -28,24 +43,9 @@ class OrchestratorAgent(BaseAgent):
         """Best-effort extraction of the first top-level JSON object from LLM output."""
         if not text:
             return None
-
-        cleaned = text.strip()
-        cleaned = cleaned.replace("```json", "```").replace("```JSON", "```")
-        cleaned = cleaned.replace("```", "")
-        cleaned = cleaned.strip()
-
-        if not cleaned:
-            return None
-
-        # Fast path: looks like JSON already
-        if cleaned.startswith("{") and cleaned.endswith("}"):
-            return cleaned
-
-        # Try to find first {...} block (including newlines)
-        match = re.search(r"\{.*\}", cleaned, flags=re.DOTALL)
-        if not match:
-            return None
-        return match.group(0).strip()
+        # Single string-aware brace scan; code fences around the object are skipped
+        # over, and there is no greedy regex to backtrack on long outputs
+        return _find_first_json_object(text)
 
     @classmethod
     def _parse_llm_json(cls, raw: str) -> Dict[str, Any]:
@@ -53,13 +53,22 @@ class OrchestratorAgent(BaseAgent):
         if not extracted:
             raise ValueError("LLM returned empty / non-JSON response")
         try:
-            parsed = json.loads(extracted)
+            parsed = _json_loads(extracted)
         except json.JSONDecodeError as e:
             raise ValueError(f"LLM returned invalid JSON: {e}")
         if not isinstance(parsed, dict):
             raise ValueError("LLM returned JSON but not an object")
         return parsed
 
+    @staticmethod
+    async def _run_non_critical(label: str, coro, default: Any = None) -> Any:
+        """Await an agent step, logging and swallowing failures so the pipeline continues."""
+        try:
+            return await coro
+        except Exception as e:
+            logging.warning(f"{label} failed (non-critical): {e}")
+            return default
+
     async def run_assessment(self, file_paths: Dict[str, str]) -> Dict[str, Any]:
         """
         Run the full end-to-end KPI assessment pipeline (17 Agents).
@@ -76,26 +85,14 @@ class OrchestratorAgent(BaseAgent):
         from app.agents.tier1.achievement_tracker import AchievementTrackerAgent
         from app.agents.tier1.completeness_analyzer import CompletenessAnalyzerAgent
         
-        # Run Tier 1 agents with error handling - don't let one failure crash the whole pipeline
-        try:
-            await ChartUnderstandingAgent("Agent2_Chart", self.company_id, self.memory_store).process_visuals("docs")
-        except Exception as e:
-            logging.warning(f"ChartUnderstandingAgent failed (non-critical): {e}")
-        
-        try:
-            await BaselineVerificationAgent("Agent3_Verifier", self.company_id, self.memory_store).verify_baseline()
-        except Exception as e:
-            logging.warning(f"BaselineVerificationAgent failed (non-critical): {e}")
-        
-        try:
-            await AchievementTrackerAgent("Agent4_Tracker", self.company_id, self.memory_store).track_history()
-        except Exception as e:
-            logging.warning(f"AchievementTrackerAgent failed (non-critical): {e}")
-        
-        try:
-            await CompletenessAnalyzerAgent("Agent5_Completeness", self.company_id, self.memory_store).analyze_completeness()
-        except Exception as e:
-            logging.warning(f"CompletenessAnalyzerAgent failed (non-critical): {e}")
+        # Run Tier 1 agents concurrently with error handling - they read disjoint memory
+        # and don't let one failure crash the whole pipeline
+        await asyncio.gather(
+            self._run_non_critical("ChartUnderstandingAgent", ChartUnderstandingAgent("Agent2_Chart", self.company_id, self.memory_store).process_visuals("docs")),
+            self._run_non_critical("BaselineVerificationAgent", BaselineVerificationAgent("Agent3_Verifier", self.company_id, self.memory_store).verify_baseline()),
+            self._run_non_critical("AchievementTrackerAgent", AchievementTrackerAgent("Agent4_Tracker", self.company_id, self.memory_store).track_history()),
+            self._run_non_critical("CompletenessAnalyzerAgent", CompletenessAnalyzerAgent("Agent5_Completeness", self.company_id, self.memory_store).analyze_completeness()),
+        )
 
         # --- PHASE 2: DATA EXTRACTION (Agents 6-8) ---
         logging.info("--- Phase 2: Data Extraction ---")
@@ -103,69 +100,44 @@ class OrchestratorAgent(BaseAgent):
         from app.agents.tier2.governance_extractor import GovernanceExtractorAgent
         from app.agents.tier2.capex_extractor import CapexExtractorAgent
 
-        try:
-            await KPIExtractorAgent("Agent6_KPI", self.company_id, self.memory_store).extract_kpi_details()
-        except Exception as e:
-            logging.warning(f"KPIExtractorAgent failed (non-critical): {e}")
-        
-        try:
-            await GovernanceExtractorAgent("Agent7_Gov", self.company_id, self.memory_store).extract_governance()
-        except Exception as e:
-            logging.warning(f"GovernanceExtractorAgent failed (non-critical): {e}")
-        
-        try:
-            await CapexExtractorAgent("Agent8_Capex", self.company_id, self.memory_store).extract_capex()
-        except Exception as e:
-            logging.warning(f"CapexExtractorAgent failed (non-critical): {e}")
+        await asyncio.gather(
+            self._run_non_critical("KPIExtractorAgent", KPIExtractorAgent("Agent6_KPI", self.company_id, self.memory_store).extract_kpi_details()),
+            self._run_non_critical("GovernanceExtractorAgent", GovernanceExtractorAgent("Agent7_Gov", self.company_id, self.memory_store).extract_governance()),
+            self._run_non_critical("CapexExtractorAgent", CapexExtractorAgent("Agent8_Capex", self.company_id, self.memory_store).extract_capex()),
+        )
 
         # --- PHASE 3: BENCHMARKING & REGULATORY (Agents 9-12) ---
         logging.info("--- Phase 3: Benchmarking & Regulatory ---")
-        # Agent 9
-        benchmark_results = {}
-        try:
-            benchmark_results = await self.bencher.run_benchmark()
-        except Exception as e:
-            logging.warning(f"Benchmark agent failed (non-critical): {e}")
-        
         from app.agents.tier3.regulatory_agents import RegulatoryAnalysisAgent
         reg_agent = RegulatoryAnalysisAgent("RegulatoryAgent", self.company_id, self.memory_store)
         
-        reg_results = {"eu_taxonomy": {}, "sbti": {}}
-        try:
-            reg_results["eu_taxonomy"] = await reg_agent.check_eu_taxonomy() # Agent 10
-        except Exception as e:
-            logging.warning(f"EU Taxonomy check failed (non-critical): {e}")
-        
+        # Benchmarking and the regulatory checks read only Tier 1/2 memory, so they run
+        # as one batch. Phase 4 stays a second batch: every analysis pass reads the
+        # "regulatory" memory and synthesis/visuals also read "benchmark".
         # CSRD compliance check removed per user request
-        
-        try:
-            reg_results["sbti"] = await reg_agent.check_sbti_validation() # Agent 12
-        except Exception as e:
-            logging.warning(f"SBTi validation check failed (non-critical): {e}")
+        benchmark_results, eu_taxonomy, sbti = await asyncio.gather(
+            self._run_non_critical("Benchmark agent", self.bencher.run_benchmark(), default={}), # Agent 9
+            self._run_non_critical("EU Taxonomy check", reg_agent.check_eu_taxonomy(), default={}), # Agent 10
+            self._run_non_critical("SBTi validation check", reg_agent.check_sbti_validation(), default={}), # Agent 12
+        )
+        reg_results = {"eu_taxonomy": eu_taxonomy, "sbti": sbti}
 
         # --- PHASE 4: ANALYSIS & SYNTHESIS (Agents 13-16) ---
         logging.info("--- Phase 4: Analysis & Synthesis ---")
         from app.agents.tier4.analysis_agents import AnalysisAgents
         analyzer = AnalysisAgents("AnalysisBrain", self.company_id, self.memory_store)
         
-        achievability = {}
-        try:
-            achievability = await analyzer.assess_achievability() # Agent 13
-        except Exception as e:
-            logging.warning(f"Achievability assessment failed (non-critical): {e}")
+        # Agents 13, 14 and 15/16 are independent LLM round trips - run them concurrently
+        achievability, synthesis, visuals = await analyzer.run_all()
+        if isinstance(achievability, Exception):
+            logging.warning(f"Achievability assessment failed (non-critical): {achievability}")
             achievability = {"score": 50, "reasoning": "Assessment failed - manual review recommended"}
-        
-        synthesis = {}
-        try:
-            synthesis = await analyzer.synthesize_evidence() # Agent 14
-        except Exception as e:
-            logging.warning(f"Evidence synthesis failed (non-critical): {e}")
-        
-        visuals = {}
-        try:
-            visuals = await analyzer.generate_visual_json() # Agent 15/16
-        except Exception as e:
-            logging.warning(f"Visual generation failed (non-critical): {e}")
+        if isinstance(synthesis, Exception):
+            logging.warning(f"Evidence synthesis failed (non-critical): {synthesis}")
+            synthesis = {}
+        if isinstance(visuals, Exception):
+            logging.warning(f"Visual generation failed (non-critical): {visuals}")
+            visuals = {}
         
         # Credit memo can take a long time - wrap in try/catch
         try:
@@ -188,15 +160,30 @@ class OrchestratorAgent(BaseAgent):
                 "figures": []
             }
         
+        # Tier 4 results are already readable locally; push their Supermemory writes together
+        try:
+            await self.memory_store.flush_pending()
+        except Exception as e:
+            logging.warning(f"Deferred memory flush failed (non-critical): {e}")
+        
         # --- PHASE 5: FINAL DECISION (Agent 17) ---
         logging.info("--- Phase 5: Final Decision ---")
         
+        # Serialized once, capped per block, and shared by the decision and repair prompts
+        decision_context = "\n".join(
+            f"        - {label}: {_dump_decision_block(value)}"
+            for label, value in (
+                ("Benchmarking", benchmark_results),
+                ("Regulatory", reg_results),
+                ("Achievability", achievability),
+                ("Synthesis", synthesis),
+            )
+        )
+        decision_memory = await self.build_memory_context("final credit decision", _DECISION_CATEGORIES)
+        
         final_decision_task = f"""
         Based on the EXTENSIVE memory context generated by the swarm of agents:
-        - Benchmarking: {json.dumps(benchmark_results)}
-        - Regulatory: {json.dumps(reg_results)}
-        - Achievability: {json.dumps(achievability)}
-        - Synthesis: {json.dumps(synthesis)}
+{decision_context}
         
         Generate the final Banker's Credit Recommendation.
         
@@ -214,29 +201,33 @@ class OrchestratorAgent(BaseAgent):
         }}
         """
         
-        decision_raw = await self.think_with_memory(final_decision_task, ["benchmark", "analysis", "regulatory"])
+        decision_raw = await self.think_with_memory(final_decision_task, _DECISION_CATEGORIES, memory_context=decision_memory)
 
         try:
             decision = self._parse_llm_json(decision_raw)
         except Exception as first_error:
             # One repair attempt: ask the model to re-emit STRICT JSON only.
-            repair_task = """
+            repair_task = f"""
 Your previous response was invalid or empty JSON.
 
+Agent results:
+{decision_context}
+
 Return STRICT JSON ONLY (no markdown, no backticks, no commentary) with this exact schema:
-{
+{{
   "recommendation": "APPROVE" | "CONDITIONAL_APPROVAL" | "REJECT",
   "confidence": "HIGH" | "MEDIUM" | "LOW",
   "overall_recommendation": "...",
   "recommendation_rationale": "...",
-  "key_findings": [{"category": "Benchmark", "assessment": "STRONG", "detail": "..."}],
+  "key_findings": [{{"category": "Benchmark", "assessment": "STRONG", "detail": "..."}}],
   "conditions_for_approval": ["..."]
-}
+}}
 """.strip()
 
             repaired_raw = await self.think_with_memory(
                 repair_task,
-                ["benchmark", "analysis", "regulatory"],
+                _DECISION_CATEGORIES,
+                memory_context=decision_memory,
             )
             try:
                 decision = self._parse_llm_json(repaired_raw)
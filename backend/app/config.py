@@ -1,13 +1,57 @@
 """
 GreenGuard ESG Platform - Configuration Settings
 """
+import io
 import os
-from typing import Optional
+import stat
+import select
+import logging
+from typing import FrozenSet, Optional
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
 
+# Use absolute path to find .env file, regardless of where the app is run from
+_ENV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+# How long to wait for a FIFO .env (e.g. a secrets manager's injected stream) to produce data
+_ENV_FIFO_TIMEOUT_SECONDS = 2.0
+
+
+def _resolve_env_file() -> Optional[str]:
+    """
+    Return the .env path only if it is a regular file. pydantic-settings would
+    block forever opening a FIFO with no writer, so a FIFO is instead read with a
+    timeout and its values are loaded into os.environ (existing variables win).
+    """
+    try:
+        mode = os.stat(_ENV_PATH).st_mode
+    except OSError:
+        return None
+    if stat.S_ISREG(mode):
+        return _ENV_PATH
+    if stat.S_ISFIFO(mode):
+        try:
+            fd = os.open(_ENV_PATH, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as e:
+            logging.warning(f"Could not open .env FIFO, skipping it: {e}")
+            return None
+        chunks = []
+        try:
+            while select.select([fd], [], [], _ENV_FIFO_TIMEOUT_SECONDS)[0]:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(fd)
+        from dotenv import dotenv_values
+        for key, value in dotenv_values(stream=io.StringIO(b"".join(chunks).decode("utf-8"))).items():
+            if value is not None:
+                os.environ.setdefault(key, value)
+    return None
+
+
 class Settings(BaseSettings):
     """Application configuration settings."""
     
@@ -17,24 +61,33 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     
     # Database (use SQLite for local dev, PostgreSQL for production)
-    DATABASE_URL: str = os.getenv(
-        "DATABASE_URL", 
-        "sqlite+aiosqlite:///./greenguard.db"
-    )
+    DATABASE_URL: str = "sqlite+aiosqlite:///./greenguard.db"
+    # PostgreSQL sits behind PgBouncer, which already pools server connections;
+    # set to false to use SQLAlchemy's own connection pool instead
+    DATABASE_NULL_POOL: bool = True
+    # SQLAlchemy pool sizing, used when DATABASE_NULL_POOL is false
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 300
+    
+    # Comma-separated browser origins allowed by CORS; empty allows any origin
+    # without credentials (auth uses bearer tokens, not cookies)
+    CORS_ORIGINS: str = ""
     
     # JWT Configuration
-    JWT_SECRET: str = os.getenv("JWT_SECRET", "your-super-secret-jwt-key-change-in-production")
+    JWT_SECRET: str = "your-super-secret-jwt-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
     # File Upload
-    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
+    UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
-    ALLOWED_EXTENSIONS: list = ["pdf", "png", "jpg", "jpeg", "tiff"]
+    ALLOWED_EXTENSIONS: FrozenSet[str] = frozenset({"pdf", "png", "jpg", "jpeg", "tiff"})
     
     # OCR Settings
-    TESSERACT_CMD: str = os.getenv("TESSERACT_CMD", "tesseract")
+    TESSERACT_CMD: str = "tesseract"
     
     # ESG Scoring Weights
     CARBON_WEIGHT: float = 0.25
@@ -43,23 +96,30 @@ class Settings(BaseSettings):
     WASTE_WEIGHT: float = 0.20
     
     # AI Configuration - Bytez (Primary)
-    BYTEZ_API_KEY: str = os.getenv("BYTEZ_API_KEY", "")
+    BYTEZ_API_KEY: str = ""
     BYTEZ_MODEL_OPEN: str = "Qwen/Qwen3-4B-Instruct-2507"
     BYTEZ_MODEL_CLOSED: str = "openai/gpt-5"
+    # Worker threads for blocking Bytez SDK calls
+    BYTEZ_POOL_SIZE: int = 8
     
     # Perplexity AI (Fallback)
-    PERPLEXITY_API_KEY: str = os.getenv("PERPLEXITY_API_KEY", "")
-    PERPLEXITY_MODEL: str = os.getenv("PERPLEXITY_MODEL", "sonar")
+    PERPLEXITY_API_KEY: str = ""
+    PERPLEXITY_MODEL: str = "sonar"
     PERPLEXITY_API_URL: str = "https://api.perplexity.ai/chat/completions"
     
+    # Google Gemini (used by section generation and summary fallbacks)
+    GEMINI_API_KEY: str = ""
+    
     # Voyage AI for Embeddings
-    VOYAGE_API_KEY: str = os.getenv("VOYAGE_API_KEY", "")
-    VOYAGE_EMBEDDING_MODEL: str = os.getenv("VOYAGE_EMBEDDING_MODEL", "voyage-3.5")
+    VOYAGE_API_KEY: str = ""
+    VOYAGE_EMBEDDING_MODEL: str = "voyage-3.5"
     EMBEDDING_DIMENSION: int = 1024
+    # Persistent embedding cache (requires diskcache); empty disables the disk tier
+    EMBEDDING_CACHE_DIR: str = ".embedding_cache"
     
     # Supabase Configuration
-    SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
-    SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
     
     # RAG Configuration
     CHUNK_SIZE: int = 1000
@@ -67,21 +127,24 @@ class Settings(BaseSettings):
     TOP_K_RETRIEVAL: int = 5
     
     # OpenRouter (Secondary Fallback)
-    OPENROUTER_API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
-    OPENROUTER_API_KEY_2: str = os.getenv("OPENROUTER_API_KEY_2", "")
+    OPENROUTER_API_KEY: str = ""
+    OPENROUTER_API_KEY_2: str = ""
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
     
     # Ollama Configuration (Local)
-    OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
 
     # Supermemory Configuration
-    SUPERMEMORY_API_KEY: str = os.getenv("SUPERMEMORY_API_KEY", "")
+    SUPERMEMORY_API_KEY: str = ""
+    # Cap on facts kept in each MemoryStore's local fallback store (LFU eviction)
+    MEMORY_LOCAL_MAX_FACTS: int = 5000
     
-    class Config:
-        # Use absolute path to find .env file, regardless of where the app is run from
-        env_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
-        case_sensitive = True
-        extra = "ignore"
+    # Environment variables (and the .env file) override the defaults above
+    model_config = SettingsConfigDict(
+        env_file=_resolve_env_file(),
+        case_sensitive=True,
+        extra="ignore"
+    )
 
 
 @lru_cache()
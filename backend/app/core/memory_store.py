@@ -1,7 +1,13 @@
 import os
-import json
+import re
+import heapq
+import asyncio
+import time
 import logging
-from typing import Any, Dict, List, Optional
+import orjson
+from collections import Counter, OrderedDict, defaultdict
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 try:
     from supermemory import Supermemory
@@ -10,6 +16,35 @@ except ImportError:
     SUPERMEMORY_AVAILABLE = False
     logging.warning("Supermemory not found. MemoryStore will fail if used.")
 
+# Supermemory searches slower than this are logged, so slow or retrying lookups
+# on the agent critical path show up instead of silently adding latency
+SLOW_SEARCH_WARN_SECONDS = 2.0
+
+
+# Local facts and queries are tokenized on alphanumeric runs, so "target_value"
+# indexes as "target" and "value"
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# The Supermemory SDK is synchronous; its calls run in worker threads, at most this many at once
+SUPERMEMORY_MAX_CONCURRENCY = 16
+
+
+# Local fact writes are indexed in batches: after this many buffered facts,
+# or this long after the first one, whichever comes first
+LOCAL_INDEX_BATCH_SIZE = 64
+LOCAL_INDEX_DELAY_SECONDS = 0.05
+
+# Raw Supermemory search results are reused for identical queries within this window
+SEARCH_CACHE_TTL_SECONDS = 30.0
+SEARCH_CACHE_MAX_ENTRIES = 256
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a memory payload with orjson; unknown types fall back to str()."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
 class MemoryStore:
     """
     Wrapper for Supermemory integration to store and retrieve agent memories.
@@ -24,18 +59,49 @@ class MemoryStore:
         
         self.client = None
         # Local fallback store so the agent pipeline works without Supermemory.
-        # Format: list of dicts with keys: category, key, value, metadata
-        self._local_facts: List[Dict[str, Any]] = []
+        # Format: dicts with keys: category, key, value, metadata
+        # Keyed by an increasing fact id, so higher ids are newer. Bounded to
+        # max_local_facts; the least frequently retrieved (then oldest) fact is evicted,
+        # never one from the batch being inserted.
+        self._local_facts: Dict[int, Dict[str, Any]] = {}
+        self._next_fact_id = 0
+        self._hit_counts: Counter = Counter()
+        # Min-heap of (hit count, fact id) for eviction; entries go stale when a fact
+        # is retrieved again or evicted and are skipped when popped
+        self._evict_heap: List[Tuple[int, int]] = []
+        self.max_local_facts = settings.MEMORY_LOCAL_MAX_FACTS
+        # Inverted index over local facts: token -> fact ids, category -> fact ids
+        self._token_index: Dict[str, Set[int]] = defaultdict(set)
+        self._by_category: Dict[str, Set[int]] = defaultdict(set)
+        # Lowercased JSON of each local fact, keyed like _local_facts, serialized once at insert
+        self._haystacks: Dict[int, str] = {}
+        # Facts written but not yet indexed; bursts are indexed together, and any
+        # local read indexes them first so writes are always visible
+        self._unindexed: List[Dict[str, Any]] = []
+        self._index_timer: Optional[asyncio.TimerHandle] = None
+        # Supermemory writes deferred by store_fact(defer_remote=True), sent by flush_pending()
+        self._pending_remote: List[Dict[str, Any]] = []
+        self._remote_slots = asyncio.Semaphore(SUPERMEMORY_MAX_CONCURRENCY)
+        # Normalized query -> (stored_at, raw results); cleared on every write.
+        # Concurrent misses for the same query share one in-flight search.
+        self._search_cache: "OrderedDict[str, Tuple[float, List[Any]]]" = OrderedDict()
+        self._search_inflight: Dict[str, "asyncio.Future"] = {}
         if SUPERMEMORY_AVAILABLE:
             try:
                 # Assuming standard initialization for Supermemory SDK
                 self.client = Supermemory(api_key=self.api_key)
             except Exception as e:
                 logging.error(f"Failed to initialize Supermemory client: {e}")
+        # The SDK's search entry point, resolved once: query -> raw response
+        self._search_fn = self._resolve_search_fn() if self.client else None
 
     async def store_fact(self, category: str, key: str, value: Any, 
-                        metadata: Optional[Dict] = None):
-        """Store a fact in memory."""
+                        metadata: Optional[Dict] = None, defer_remote: bool = False):
+        """
+        Store a fact in memory.
+        With defer_remote=True the fact is readable locally right away and the
+        Supermemory write is queued until flush_pending() is awaited.
+        """
         # ALWAYS store locally as well for immediate retrieval fallback
         # (Supermemory indexing can have delays)
         local_entry = {
@@ -44,14 +110,19 @@ class MemoryStore:
             "value": value,
             "metadata": {"category": category, "key": key, **(metadata or {})},
         }
-        self._local_facts.append(local_entry)
+        self._unindexed.append(local_entry)
+        self._search_cache.clear()
+        if len(self._unindexed) >= LOCAL_INDEX_BATCH_SIZE:
+            self._index_pending()
+        elif self._index_timer is None:
+            self._index_timer = asyncio.get_running_loop().call_later(LOCAL_INDEX_DELAY_SECONDS, self._index_pending)
         
         if not self.client:
             logging.info(f"Stored fact locally: {category}/{key}")
             return
 
         # Prepare payload
-        content = json.dumps({
+        content = _dumps({
             "category": category,
             "key": key,
             "value": value
@@ -61,6 +132,59 @@ class MemoryStore:
         if metadata:
             full_metadata.update(metadata)
 
+        if defer_remote:
+            self._pending_remote.append({"content": content, "metadata": full_metadata})
+            logging.info(f"Stored fact locally, Supermemory write deferred: {category}/{key}")
+            return
+
+        await self._run_remote(self._add_remote, content, full_metadata)
+
+    async def flush_pending(self):
+        """Send all deferred Supermemory writes in one pass."""
+        if not self._pending_remote:
+            return
+        pending, self._pending_remote = self._pending_remote, []
+        if not self.client:
+            return
+        await asyncio.gather(*(
+            self._run_remote(self._add_remote, item["content"], item["metadata"]) for item in pending
+        ))
+        logging.info(f"Flushed {len(pending)} deferred facts to Supermemory")
+
+    async def _search_remote_cached(self, query: str) -> Optional[List[Any]]:
+        """Supermemory search through the short-lived query cache."""
+        key = (query or "").lower().strip()
+        entry = self._search_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < SEARCH_CACHE_TTL_SECONDS:
+            self._search_cache.move_to_end(key)
+            return entry[1]
+        task = self._search_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_remote(self._search_remote, query))
+            self._search_inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish_search(k, t))
+        # Shielded so one cancelled caller does not cancel the search for the others
+        return await asyncio.shield(task)
+
+    def _finish_search(self, key: str, task: "asyncio.Future"):
+        """Cache a completed search; failed or empty-handed searches are not cached."""
+        self._search_inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        self._search_cache[key] = (time.monotonic(), task.result())
+        self._search_cache.move_to_end(key)
+        while len(self._search_cache) > SEARCH_CACHE_MAX_ENTRIES:
+            self._search_cache.popitem(last=False)
+
+    async def _run_remote(self, fn, *args):
+        """Run a blocking Supermemory SDK call in a worker thread, bounded by SUPERMEMORY_MAX_CONCURRENCY."""
+        async with self._remote_slots:
+            return await asyncio.to_thread(fn, *args)
+
+    def _add_remote(self, content: str, full_metadata: Dict[str, Any]):
+        """Write a single serialized fact to Supermemory."""
+        category = full_metadata.get("category")
+        key = full_metadata.get("key")
         try:
             # Supermemory add/ingest method (hypothetical, based on typical SDKs)
             # Adjust if the actual API differs (e.g. client.add_memory)
@@ -77,98 +201,28 @@ class MemoryStore:
 
     async def retrieve_memory(self, query: str, category: Optional[str] = None) -> List[Dict]:
         """Retrieve memories using semantic search."""
+        if not (query or "").strip():
+            # Nothing to search for: newest local facts, without a Supermemory round trip
+            return self._search_local_facts("", category)
         if not self.client:
-            # Simple local retrieval: rank by substring hits in JSON-dumped value.
+            # Simple local retrieval: newest facts containing the query phrase.
+            # The token index narrows candidates to facts holding every query word;
+            # only those are checked for the exact phrase.
             q = (query or "").lower()
-            results: List[Dict[str, Any]] = []
-            for item in reversed(self._local_facts):
-                if category and item.get("category") != category:
-                    continue
-                haystack = json.dumps(item, default=str).lower()
-                if not q or q in haystack:
-                    results.append({
-                        "category": item.get("category"),
-                        "key": item.get("key"),
-                        "value": item.get("value"),
-                        "metadata": item.get("metadata", {}),
-                    })
-                if len(results) >= 5:
-                    break
-            return results
+            hits = list(islice((
+                fact_id for fact_id in self._candidate_ids(_TOKEN_RE.findall(q), category, match_all=True)
+                if not q or q in self._haystacks[fact_id]
+            ), 5))
+            # The phrase may also end mid-word ("emission" in "emissions")
+            hits = self._with_fragment_hits(hits, [q], category, match_all=True, limit=5)
+            self._record_hits(hits)
+            return [self._public_fact(self._local_facts[fact_id]) for fact_id in hits]
 
         try:
-            # Supermemory query/search method
-            # Adjusted based on "SearchResource object is not callable"
-            if hasattr(self.client, 'search') and callable(self.client.search):
-                 # It's a method
-                 response = self.client.search(query=query, top_k=5)
-            elif hasattr(self.client, 'search'):
-                 # It's a resource/object with documented methods: execute, memories, documents
-                 search_res = self.client.search
-                 if hasattr(search_res, 'execute'):
-                    # execute likely takes 'q' and 'limit' or just 'q'
-                    response = search_res.execute(q=query) # Removed top_k as it caused error
-                 elif hasattr(search_res, 'memories'):
-                    response = search_res.memories(query=query, limit=5) # standard name
-                 else:
-                    logging.error(f"Supermemory search resource methods: {[m for m in dir(search_res) if not m.startswith('_')]}")
-                    return []
-            elif hasattr(self.client, 'query'):
-                 response = self.client.query(query=query, top_k=5)
-            else:
-                 # Fallback/Debug
-                 methods = [m for m in dir(self.client) if not m.startswith('_')]
-                 logging.error(f"Supermemory method not found. Available: {methods}")
-                 return []
-            
-            # Parse response - assuming list of objects with 'content' and 'metadata'
-            memories = []
-            
-            # Normalize response format (it might be a dict or list of objects)
-            # Fix: Handle object attribute access vs dict access safely
-            results = []
-            if isinstance(response, list):
-                results = response
-            elif hasattr(response, 'results'):
-                results = getattr(response, 'results', []) or []
-            elif hasattr(response, 'get'):
-                results = response.get('results', []) or []
-            else:
-                 # It might be an iterable object itself
-                 try:
-                     iter(response)
-                     results = response
-                 except:
-                     logging.warning(f"Unknown response type: {type(response)}")
-
-            for res in results:
-                # Accessing attributes or dict keys depending on SDK return type
-                # Handle Pydantic V1/V2 or Dict
-                content = getattr(res, 'content', None) or (res.get('content') if hasattr(res, 'get') else None)
-                meta = getattr(res, 'metadata', None) or (res.get('metadata', {}) if hasattr(res, 'get') else {})
-                
-                # Filter by category if possible (client-side)
-                if category and isinstance(meta, dict) and meta.get('category') != category:
-                    continue
-                
-                try:
-                    if content:
-                        # Try to parse if it looks like JSON, otherwise keep raw
-                        if isinstance(content, str) and (content.startswith('{') or content.startswith('[')):
-                             loaded = json.loads(content)
-                             # If loaded has category/key/value structure, preserve it
-                             if isinstance(loaded, dict):
-                                 # Enrich with metadata if not present
-                                 if "metadata" not in loaded and meta:
-                                     loaded["metadata"] = meta
-                                 memories.append(loaded)
-                             else:
-                                 memories.append({"raw": content, "metadata": meta, "parsed": loaded})
-                        else:
-                             memories.append({"raw": content, "metadata": meta})
-                except Exception as parse_err:
-                    logging.debug(f"MemoryStore: Failed to parse content as JSON: {parse_err}")
-                    memories.append({"raw": content, "metadata": meta})
+            results = await self._search_remote_cached(query)
+            if results is None:
+                return []
+            memories = self._parse_remote_results(results, category)
             
             # Fallback to local facts if Supermemory returned nothing
             # (common during indexing delays)
@@ -182,21 +236,253 @@ class MemoryStore:
             # Try local fallback on error
             return self._search_local_facts(query, category)
 
+    async def retrieve_memory_multi(self, query: str, categories: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Retrieve memories for several categories with a single search.
+        The query is identical for every category, so Supermemory is hit once and
+        results are bucketed client-side by metadata category.
+        """
+        if not self.client or not (query or "").strip():
+            return {c: await self.retrieve_memory(query, c) for c in categories}
+
+        try:
+            results = await self._search_remote_cached(query)
+        except Exception as e:
+            logging.error(f"Error retrieving memory from Supermemory: {e}")
+            results = None
+
+        grouped: Dict[str, List[Dict]] = {}
+        for category in categories:
+            memories = self._parse_remote_results(results, category) if results else []
+            if not memories:
+                memories = self._search_local_facts(query, category)
+            grouped[category] = memories
+        return grouped
+
+    def _search_remote(self, query: str) -> Optional[List[Any]]:
+        """Run a Supermemory search, logging it when it exceeds SLOW_SEARCH_WARN_SECONDS."""
+        started = time.monotonic()
+        try:
+            return self._search_remote_raw(query)
+        finally:
+            elapsed = time.monotonic() - started
+            if elapsed > SLOW_SEARCH_WARN_SECONDS:
+                logging.warning(f"MemoryStore: slow Supermemory search ({elapsed:.1f}s) for query: {query[:80]}")
+
+    def _resolve_search_fn(self):
+        """Pick the Supermemory search call once from the SDK's shape; None if there is none."""
+        # Adjusted based on "SearchResource object is not callable"
+        search = getattr(self.client, 'search', None)
+        if search is not None and callable(search):
+            # It's a method
+            return lambda q: search(query=q, top_k=5)
+        if search is not None:
+            # It's a resource/object with documented methods: execute, memories, documents
+            if hasattr(search, 'execute'):
+                # execute likely takes 'q' and 'limit' or just 'q'
+                return lambda q: search.execute(q=q) # Removed top_k as it caused error
+            if hasattr(search, 'memories'):
+                return lambda q: search.memories(query=q, limit=5) # standard name
+            logging.error(f"Supermemory search resource methods: {[m for m in dir(search) if not m.startswith('_')]}")
+            return None
+        if hasattr(self.client, 'query'):
+            return lambda q: self.client.query(query=q, top_k=5)
+        # Fallback/Debug
+        methods = [m for m in dir(self.client) if not m.startswith('_')]
+        logging.error(f"Supermemory method not found. Available: {methods}")
+        return None
+
+    def _search_remote_raw(self, query: str) -> Optional[List[Any]]:
+        """Run a Supermemory search and normalize the response to a list of results."""
+        if self._search_fn is None:
+            return None
+        response = self._search_fn(query)
+        
+        # Normalize response format (it might be a dict or list of objects)
+        # Fix: Handle object attribute access vs dict access safely
+        results = []
+        if isinstance(response, list):
+            results = response
+        elif hasattr(response, 'results'):
+            results = getattr(response, 'results', []) or []
+        elif hasattr(response, 'get'):
+            results = response.get('results', []) or []
+        else:
+             # It might be an iterable object itself
+             try:
+                 iter(response)
+                 results = response
+             except TypeError:
+                 logging.warning(f"Unknown response type: {type(response)}")
+        return list(results)
+
+    def _parse_remote_results(self, results: List[Any], category: Optional[str] = None) -> List[Dict]:
+        """Convert Supermemory results into memory dicts, filtered by category."""
+        memories = []
+        for res in results:
+            # Accessing attributes or dict keys depending on SDK return type
+            # Handle Pydantic V1/V2 or Dict
+            content = getattr(res, 'content', None) or (res.get('content') if hasattr(res, 'get') else None)
+            meta = getattr(res, 'metadata', None) or (res.get('metadata', {}) if hasattr(res, 'get') else {})
+            
+            # Filter by category if possible (client-side)
+            if category and isinstance(meta, dict) and meta.get('category') != category:
+                continue
+            
+            if not content:
+                continue
+            loaded = None
+            if isinstance(content, str):
+                # orjson rejects non-JSON text quickly, so no "looks like JSON" sniffing first
+                try:
+                    loaded = orjson.loads(content)
+                except orjson.JSONDecodeError as parse_err:
+                    logging.debug(f"MemoryStore: Failed to parse content as JSON: {parse_err}")
+            # If loaded has category/key/value structure, preserve it
+            if isinstance(loaded, dict):
+                # Enrich with metadata if not present
+                if "metadata" not in loaded and meta:
+                    loaded["metadata"] = meta
+                memories.append(loaded)
+            elif isinstance(loaded, list):
+                memories.append({"raw": content, "metadata": meta, "parsed": loaded})
+            else:
+                memories.append({"raw": content, "metadata": meta})
+        
+        return memories
+
     def _search_local_facts(self, query: str, category: Optional[str] = None, limit: int = 5) -> List[Dict]:
-        """Search local facts as fallback."""
-        q = (query or "").lower()
-        results: List[Dict[str, Any]] = []
-        for item in reversed(self._local_facts):
-            if category and item.get("category") != category:
+        """Search local facts as fallback: newest facts sharing any word with the query."""
+        words = _TOKEN_RE.findall((query or "").lower())
+        hits = self._candidate_ids(words, category, match_all=False)
+        if words:
+            hits = self._with_fragment_hits(hits, words, category, match_all=False, limit=limit)
+        hits = hits[:limit]
+        self._record_hits(hits)
+        return [self._public_fact(self._local_facts[fact_id]) for fact_id in hits]
+
+    def _index_pending(self):
+        """Index all buffered facts in one pass, then evict down to max_local_facts."""
+        if self._index_timer is not None:
+            self._index_timer.cancel()
+            self._index_timer = None
+        if not self._unindexed:
+            return
+        pending, self._unindexed = self._unindexed, []
+        first_new_id = self._next_fact_id
+        for entry in pending:
+            fact_id = self._next_fact_id
+            self._next_fact_id += 1
+            self._index_fact(fact_id, entry)
+            self._local_facts[fact_id] = entry
+            heapq.heappush(self._evict_heap, (0, fact_id))
+        while len(self._local_facts) > self.max_local_facts:
+            self._evict_fact(first_new_id)
+
+    def _index_fact(self, fact_id: int, entry: Dict[str, Any]):
+        """Cache a local fact's serialized form and add its tokens and category to the index."""
+        haystack = _dumps(entry).lower()
+        self._haystacks[fact_id] = haystack
+        for token in set(_TOKEN_RE.findall(haystack)):
+            self._token_index[token].add(fact_id)
+        self._by_category[entry.get("category")].add(fact_id)
+
+    def _record_hits(self, fact_ids: List[int]):
+        """Count retrievals of local facts and requeue them for eviction at their new count."""
+        for fact_id in fact_ids:
+            self._hit_counts[fact_id] += 1
+            heapq.heappush(self._evict_heap, (self._hit_counts[fact_id], fact_id))
+        if len(self._evict_heap) > 4 * len(self._local_facts) + LOCAL_INDEX_BATCH_SIZE:
+            # Drop stale entries once they dominate the heap
+            self._evict_heap = [(self._hit_counts[i], i) for i in self._local_facts]
+            heapq.heapify(self._evict_heap)
+
+    def _pop_eviction_candidate(self, protected_from: int) -> Optional[int]:
+        """Pop the least retrieved (then oldest) live fact below `protected_from`."""
+        skipped = []
+        fact_id = None
+        while self._evict_heap:
+            hits, candidate = heapq.heappop(self._evict_heap)
+            if candidate not in self._local_facts or hits != self._hit_counts[candidate]:
                 continue
-            haystack = json.dumps(item, default=str).lower()
-            if not q or any(word in haystack for word in q.split()):
-                results.append({
-                    "category": item.get("category"),
-                    "key": item.get("key"),
-                    "value": item.get("value"),
-                    "metadata": item.get("metadata", {}),
-                })
-            if len(results) >= limit:
-                break
-        return results
+            if candidate >= protected_from:
+                skipped.append((hits, candidate))
+                continue
+            fact_id = candidate
+            break
+        for item in skipped:
+            heapq.heappush(self._evict_heap, item)
+        return fact_id
+
+    def _evict_fact(self, protected_from: int):
+        """
+        Drop the least frequently retrieved local fact (oldest on ties) and unindex it.
+        Facts with ids from `protected_from` on (the batch being inserted) are only
+        evicted, oldest first, when the batch alone exceeds max_local_facts.
+        """
+        fact_id = self._pop_eviction_candidate(protected_from)
+        if fact_id is None:
+            # Ids are inserted in increasing order, so the first key is the oldest fact
+            fact_id = next(iter(self._local_facts))
+        entry = self._local_facts.pop(fact_id)
+        for token in set(_TOKEN_RE.findall(self._haystacks.pop(fact_id))):
+            postings = self._token_index.get(token)
+            if postings is not None:
+                postings.discard(fact_id)
+                if not postings:
+                    del self._token_index[token]
+        self._by_category[entry.get("category")].discard(fact_id)
+        self._hit_counts.pop(fact_id, None)
+
+    def _candidate_ids(self, words: Iterable[str], category: Optional[str], match_all: bool) -> List[int]:
+        """
+        Fact ids matching the query words (all of them, or any with match_all=False)
+        and the category, newest first. No words matches every fact.
+        """
+        self._index_pending()
+        postings = [self._token_index.get(w, set()) for w in set(words)]
+        if postings:
+            ids = set.intersection(*postings) if match_all else set.union(*postings)
+            if category:
+                ids = ids & self._by_category.get(category, set())
+        elif category:
+            ids = self._by_category.get(category, set())
+        else:
+            return sorted(self._local_facts, reverse=True)
+        return sorted(ids, reverse=True)
+
+    def _substring_ids(self, needles: List[str], category: Optional[str], match_all: bool,
+                       newer_than: int = -1) -> List[int]:
+        """
+        Fact ids above `newer_than` whose cached text contains the needles (all of
+        them, or any with match_all=False) as substrings, newest first.
+        """
+        pool = self._by_category.get(category, set()) if category else self._local_facts
+        test = all if match_all else any
+        return sorted(
+            (fact_id for fact_id in pool
+             if fact_id > newer_than and test(n in self._haystacks[fact_id] for n in needles)),
+            reverse=True,
+        )
+
+    def _with_fragment_hits(self, hits: List[int], needles: List[str], category: Optional[str],
+                            match_all: bool, limit: int) -> List[int]:
+        """
+        Merge whole-token hits with facts that contain the needles only as word
+        fragments ("emission" in "emissions"), keeping the newest `limit` of either,
+        as a plain substring scan would. Only facts newer than the limit-th token
+        hit can displace it, so only those are scanned.
+        """
+        newer_than = hits[limit - 1] if len(hits) >= limit else -1
+        merged = set(hits[:limit]).union(self._substring_ids(needles, category, match_all, newer_than))
+        return sorted(merged, reverse=True)[:limit]
+
+    @staticmethod
+    def _public_fact(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a local fact the way retrieval results are returned."""
+        return {
+            "category": item.get("category"),
+            "key": item.get("key"),
+            "value": item.get("value"),
+            "metadata": item.get("metadata", {}),
+        }
@@ -0,0 +1,153 @@
+"""
+Semantic result cache for analysis outputs (credit memos, memo sections, document analyses).
+
+Two tiers, both partitioned by (task_id, scope):
+1. Exact: sha256 of the normalized memory context.
+2. Semantic: cosine similarity of Voyage embeddings of the normalized context,
+   accepted at or above `threshold` when the numbers in both contexts are
+   identical. Only used when VOYAGE_API_KEY is configured.
+"""
+import re
+import copy
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+# Timestamps and ISO dates change between otherwise identical pipeline runs
+_TIMESTAMP_RE = re.compile(r'"?(timestamp|as_of_date|created_at|updated_at)"?\s*[:=]\s*"[^"]*"')
+_ISO_DATETIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?")
+# Embeddings barely move when a figure changes, so numbers must match exactly
+_NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)*")
+
+# Voyage input is truncated to this many characters before embedding
+_MAX_EMBED_CHARS = 16000
+
+
+def normalize_context(memory_context: str) -> str:
+    """Strip volatile values and ordering so structurally equivalent contexts match."""
+    text = _TIMESTAMP_RE.sub("", memory_context or "")
+    text = _ISO_DATETIME_RE.sub("", text)
+    lines = sorted(line.strip() for line in text.splitlines() if line.strip())
+    return "\n".join(lines)
+
+
+class SemanticCache:
+    """In-process LRU + TTL cache of parsed analysis results."""
+
+    def __init__(self, threshold: float = 0.92, ttl_seconds: int = 24 * 3600, max_entries: int = 256,
+                 normalize: bool = True, semantic: bool = True):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # normalize=False keys on the raw text; semantic=False keeps only the exact tier
+        self.normalize = normalize
+        self.semantic = semantic
+        # (task_id, scope, digest) -> (stored_at, embedding or None, numbers digest, result)
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Optional[np.ndarray], str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def _digest(normalized: str) -> str:
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _numbers_digest(normalized: str) -> str:
+        return hashlib.sha256(" ".join(_NUMBER_RE.findall(normalized)).encode("utf-8")).hexdigest()
+
+    async def _embed(self, normalized: str) -> Optional[np.ndarray]:
+        """Embed the normalized context; returns None when embeddings are unavailable."""
+        if not self.semantic or not settings.VOYAGE_API_KEY or not normalized:
+            return None
+        try:
+            from app.services.embedding_service import embedding_service
+            vector = await asyncio.to_thread(
+                embedding_service.generate_embedding, normalized[:_MAX_EMBED_CHARS], "document"
+            )
+        except Exception as e:
+            logging.warning(f"SemanticCache: embedding failed, exact matching only: {e}")
+            return None
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else None
+
+    def _evict_expired(self, now: float):
+        expired = [k for k, (stored_at, _, _, _) in self._entries.items() if now - stored_at > self.ttl_seconds]
+        for k in expired:
+            del self._entries[k]
+
+    def _state(self, memory_context: str) -> Dict[str, Any]:
+        normalized = normalize_context(memory_context) if self.normalize else (memory_context or "")
+        return {
+            "normalized": normalized,
+            "digest": self._digest(normalized),
+            "numbers": self._numbers_digest(normalized),
+            "embedding": None,
+        }
+
+    async def prepare(self, memory_context: str) -> Dict[str, Any]:
+        """
+        Normalize and embed a context once so several lookups can share it.
+        Pass the returned state to lookup() and put().
+        """
+        state = self._state(memory_context)
+        state["embedding"] = await self._embed(state["normalized"])
+        return state
+
+    def lookup(self, task_id: str, scope: str, state: Dict[str, Any]) -> Optional[Any]:
+        """Look up a cached result for a state returned by prepare()."""
+        self._evict_expired(time.time())
+        key = (task_id, scope, state["digest"])
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            logging.info(f"SemanticCache: exact hit for {task_id}")
+            return copy.deepcopy(entry[3])
+
+        embedding = state.get("embedding")
+        if embedding is None:
+            return None
+        candidates: List[Tuple[Tuple[str, str, str], np.ndarray]] = [
+            (k, emb) for k, (_, emb, nums, _) in self._entries.items()
+            if k[0] == task_id and k[1] == scope and emb is not None and nums == state["numbers"]
+        ]
+        if not candidates:
+            return None
+
+        matrix = np.stack([emb for _, emb in candidates])
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            best_key = candidates[best][0]
+            self._entries.move_to_end(best_key)
+            logging.info(f"SemanticCache: semantic hit for {task_id} (cosine={scores[best]:.3f})")
+            return copy.deepcopy(self._entries[best_key][3])
+        return None
+
+    async def get(self, task_id: str, scope: str, memory_context: str) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """
+        Look up a cached result.
+        Returns (result or None, lookup_state); pass lookup_state back to put() on a miss
+        so the context is not normalized or embedded twice.
+        """
+        state = self._state(memory_context)
+        # Try the exact tier before paying for an embedding
+        result = self.lookup(task_id, scope, state)
+        if result is not None:
+            return result, state
+        state["embedding"] = await self._embed(state["normalized"])
+        return self.lookup(task_id, scope, state), state
+
+    def put(self, task_id: str, scope: str, state: Dict[str, Any], result: Any):
+        """Store a copy of a validated result under the lookup state returned by get()."""
+        key = (task_id, scope, state["digest"])
+        # Copy so later mutation by the caller (e.g. as_of_date stamping) never leaks into the cache
+        self._entries[key] = (time.time(), state.get("embedding"), state["numbers"], copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,12 +1,19 @@
 """
 GreenGuard ESG Platform - Database Configuration
 """
+import asyncio
 import logging
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from functools import lru_cache
+import orjson
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy import MetaData, event, text
 from app.config import settings
 
+# SQLite (local dev) vs PostgreSQL (production) is fixed for the process
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
 # Naming convention for constraints
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -22,47 +29,97 @@ metadata = MetaData(naming_convention=convention)
 class Base(DeclarativeBase):
     """Base class for all database models."""
     metadata = metadata
+    # Timestamps are generated by the database (server_default / onupdate=func.now());
+    # fetch them back with RETURNING so attributes are loaded after flush instead of
+    # lazily (which async sessions cannot do)
+    __mapper_args__ = {"eager_defaults": True}
 
 
-# Create async engine - SQLite doesn't support pool settings
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine = create_async_engine(
-        settings.DATABASE_URL,
-        echo=settings.DEBUG,
-        future=True,
-        connect_args={"check_same_thread": False}
-    )
-else:
+def _json_serializer(value) -> str:
+    """Serializer for JSON/JSONB columns; non-JSON values (datetimes etc.) become strings."""
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+# Shared by every engine branch
+_JSON_KWARGS = {"json_serializer": _json_serializer, "json_deserializer": orjson.loads}
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@lru_cache()
+def get_engine() -> AsyncEngine:
+    """Create the process-wide async engine on first use."""
+    # SQLite doesn't support pool settings
+    if IS_SQLITE:
+        engine = create_async_engine(
+            settings.DATABASE_URL,
+            echo=settings.DEBUG,
+            future=True,
+            connect_args={"check_same_thread": False},
+            **_JSON_KWARGS
+        )
+        # SQLite ignores foreign keys (and their ON DELETE CASCADE, which the
+        # passive_deletes relationships rely on) unless enabled per connection
+        event.listen(engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+        return engine
     # For PostgreSQL with Supabase/PgBouncer, disable prepared statement caching
     # IMPORTANT: PgBouncer in transaction mode doesn't support prepared statements
-    engine = create_async_engine(
+    connect_args = {
+        "statement_cache_size": 0,  # CRITICAL: Disable statement caching for PgBouncer
+        "prepared_statement_cache_size": 0,  # CRITICAL: Disable prepared statement cache
+        "command_timeout": 60,
+        "server_settings": {
+            "application_name": "greenguard_backend",
+            "jit": "off"  # Disable JIT for better PgBouncer compatibility
+        }
+    }
+    if settings.DATABASE_NULL_POOL:
+        # PgBouncer multiplexes server connections, so a second client-side pool only
+        # adds idle connections, pre-ping round trips and recycle churn
+        return create_async_engine(
+            settings.DATABASE_URL,
+            echo=settings.DEBUG,
+            future=True,
+            poolclass=NullPool,
+            connect_args=connect_args,
+            **_JSON_KWARGS
+        )
+    return create_async_engine(
         settings.DATABASE_URL,
         echo=settings.DEBUG,
         future=True,
+        # The asyncio-aware queue pool (the default for async engines, spelled out
+        # because the sync QueuePool deadlocks under asyncpg)
+        poolclass=AsyncAdaptedQueuePool,
         pool_pre_ping=True,
-        pool_size=10,  # Increased from 2 to handle concurrent requests
-        max_overflow=10,  # Increased from 3 for better concurrency
-        pool_recycle=300,  # Increased to 5 minutes (less aggressive recycling)
-        pool_timeout=30,
-        connect_args={
-            "statement_cache_size": 0,  # CRITICAL: Disable statement caching for PgBouncer
-            "prepared_statement_cache_size": 0,  # CRITICAL: Disable prepared statement cache
-            "command_timeout": 60,
-            "server_settings": {
-                "application_name": "greenguard_backend",
-                "jit": "off"  # Disable JIT for better PgBouncer compatibility
-            }
-        }
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        connect_args=connect_args,
+        **_JSON_KWARGS
     )
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+
+@lru_cache()
+def get_sessionmaker() -> async_sessionmaker:
+    """Create the process-wide async session factory on first use."""
+    return async_sessionmaker(
+        bind=get_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
+    )
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Open a new session from the shared session factory."""
+    return get_sessionmaker()()
 
 logger = logging.getLogger(__name__)
 
@@ -92,11 +149,50 @@ async def init_db():
     """Initialize database tables."""
     # For Supabase/PostgreSQL, tables are created manually via SQL Editor
     # Skip automatic creation to avoid PgBouncer prepared statement issues
-    if settings.DATABASE_URL.startswith("sqlite"):
-        async with engine.begin() as conn:
+    if IS_SQLITE:
+        async with get_engine().begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
 
+async def warm_db_pool():
+    """
+    Open DB_POOL_SIZE connections at startup so the first requests don't pay the
+    TCP/TLS/auth handshake. No-op for SQLite and NullPool, which keep nothing open.
+    """
+    if IS_SQLITE or settings.DATABASE_NULL_POOL:
+        return
+    engine = get_engine()
+    size = settings.DB_POOL_SIZE
+    settled = 0
+    all_open = asyncio.Event()
+
+    def _settle():
+        nonlocal settled
+        settled += 1
+        if settled == size:
+            all_open.set()
+
+    async def _touch():
+        opened = False
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                opened = True
+                _settle()
+                # Hold the connection until all are open, otherwise the pool hands back the same one
+                await all_open.wait()
+        except Exception:
+            if not opened:
+                _settle()
+            raise
+
+    results = await asyncio.gather(*(_touch() for _ in range(size)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning(f"DB pool warm-up: {len(failures)}/{size} connections failed: {failures[0]}")
+
+
 async def close_db():
     """Close database connection."""
-    await engine.dispose()
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
@@ -2,46 +2,63 @@
 GreenGuard ESG Platform - Main Application Entry Point
 """
 import os
+import atexit
+import queue
+import importlib
 import logging
 import traceback
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.config import settings
-from app.database import init_db, close_db
-from app.routers import auth, file_upload, esg_extract, ai_esg_extract, compliance, kpi_benchmark, use_of_proceeds, kpi_evaluation, kpi_benchmarking, report_chat
+from app.middleware.health_probe import HealthProbeMiddleware
+from app.database import init_db, close_db, warm_db_pool
 
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+# Configure logging: callers only enqueue records; a background listener thread
+# formats them and writes to stderr, keeping that I/O off the event loop
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S"
-)
+))
+_log_listener = QueueListener(_log_queue, _log_stream, respect_handler_level=True)
+# force=True replaces any root handlers installed earlier (a module-level logging.warning()
+# before this point, or a re-import of this module), so records are never emitted twice
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)], force=True)
+_log_listener.start()
+# Stopped once at interpreter exit, not per lifespan: the app may start and stop
+# several times in one process (tests, embedding servers). Stopping drains the queue.
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    logger.info("Starting GreenGuard ESG Platform...")
+    # Startup facts are collected and logged as one record once startup completes
+    startup_events = {"app": settings.APP_NAME, "version": settings.APP_VERSION}
     
     # Reset provider exhaustion flags on startup (in case API keys were changed)
     try:
         from app.agents.base_agent import reset_provider_flags
         reset_provider_flags()
-        logger.info("Provider exhaustion flags reset for fresh API key state")
+        startup_events["provider_flags_reset"] = True
     except Exception as e:
+        startup_events["provider_flags_reset"] = False
         logger.warning(f"Could not reset provider flags: {e}")
     
     # Check configuration
-    from app.middleware.config_check import check_configuration
-    config_ok = check_configuration()
+    # Importing the module runs the checks once for this process
+    from app.middleware.config_check import CONFIG_OK as config_ok
+    startup_events["config_ok"] = config_ok
     if not config_ok:
         logger.warning("=" * 80)
         logger.warning("⚠️  APPLICATION STARTED WITH CONFIGURATION ISSUES")
@@ -49,13 +66,24 @@ async def lifespan(app: FastAPI):
         logger.warning("=" * 80)
     
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    logger.info(f"Upload directory: {settings.UPLOAD_DIR}")
+    startup_events["upload_dir"] = settings.UPLOAD_DIR
     await init_db()
-    logger.info("Database initialized successfully")
+    startup_events["db"] = "initialized"
+    await warm_db_pool()
+    try:
+        from app.agents.base_agent import warm_shared_http_client
+        await warm_shared_http_client()
+    except Exception as e:
+        logger.warning(f"Could not warm LLM HTTP connections: {e}")
+    logger.info("app.startup %s", startup_events)
     yield
-    logger.info("Shutting down GreenGuard ESG Platform...")
     await close_db()
-    logger.info("Database connection closed")
+    try:
+        from app.agents.base_agent import close_shared_http_client
+        await close_shared_http_client()
+    except Exception as e:
+        logger.warning(f"Could not close LLM HTTP client: {e}")
+    logger.info("app.shutdown %s", {"app": settings.APP_NAME, "db": "closed"})
 
 
 app = FastAPI(
@@ -63,15 +91,23 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Backend API for GreenGuard ESG Platform",
     lifespan=lifespan,
-    docs_url="/docs",
-    redoc_url="/redoc"
+    # Route responses are serialized with orjson instead of stdlib json
+    default_response_class=ORJSONResponse,
+    # Interactive docs and the schema are development aids; production serves neither.
+    # FastAPI builds the schema once and memoizes it in app.openapi_schema.
+    docs_url="/docs" if settings.DEBUG else None,
+    redoc_url="/redoc" if settings.DEBUG else None,
+    openapi_url="/openapi.json" if settings.DEBUG else None
 )
 
 # CORS middleware
+# A configured origin list allows credentialed requests; the "*" fallback does not,
+# which lets Starlette send a static Access-Control-Allow-Origin: * header
+_CORS_ORIGINS = sorted({o.strip() for o in settings.CORS_ORIGINS.split(",") if o.strip()})
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=_CORS_ORIGINS or ["*"],
+    allow_credentials=bool(_CORS_ORIGINS),
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -79,50 +115,90 @@ app.add_middleware(
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.error(f"Validation error: {exc.errors()}")
-    return JSONResponse(
+    errors = exc.errors()
+    logger.error("Validation error: %s", errors)
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={"detail": "Validation error", "errors": exc.errors()}
+        content={"detail": "Validation error", "errors": errors}
     )
 
 
+def _error_body(detail: str, exc: Exception) -> dict:
+    """500 body; the exception text is only exposed in DEBUG."""
+    if settings.DEBUG:
+        return {"detail": detail, "message": str(exc)}
+    return {"detail": detail}
+
+
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
-    logger.error(f"Database error: {str(exc)}")
-    return JSONResponse(
+    logger.error("Database error: %s", exc)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={"detail": "Database error", "message": str(exc)}
+        content=_error_body("Database error", exc)
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    error_trace = traceback.format_exc()
-    logger.error(f"Unexpected error: {str(exc)}\n{error_trace}")
-    return JSONResponse(
+    # Formatting the traceback is the expensive part; skip it when ERROR is filtered out
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error("Unexpected error: %s\n%s", exc, traceback.format_exc())
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={"detail": "Internal server error", "message": str(exc)}
+        content=_error_body("Internal server error", exc)
     )
 
 
-# Include routers
-app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-app.include_router(file_upload.router, prefix="/upload", tags=["File Upload"])
-app.include_router(esg_extract.router, prefix="/extract", tags=["ESG Extraction"])
-app.include_router(ai_esg_extract.router, prefix="/ai-extract", tags=["AI ESG Extraction"])
-app.include_router(compliance.router, prefix="/compliance", tags=["Compliance"])
-app.include_router(kpi_benchmark.router, prefix="/kpi", tags=["KPI Benchmarking"])
-app.include_router(use_of_proceeds.router, prefix="/use-of-proceeds", tags=["Use of Proceeds"])
-app.include_router(kpi_evaluation.router, prefix="/kpi", tags=["KPI Evaluation"])
-app.include_router(kpi_benchmarking.router)  # KPI Benchmarking Engine (uses /kpi-benchmark prefix)
-app.include_router(report_chat.router)
+# Routers are mounted when this module loads, so app.routes and app.openapi() are
+# complete before startup (TestClient without a `with` block, schema export tools).
+# (module under app.routers, prefix, tags); None keeps the router's own settings
+_ROUTERS = [
+    ("auth", "/auth", ["Authentication"]),
+    ("file_upload", "/upload", ["File Upload"]),
+    ("esg_extract", "/extract", ["ESG Extraction"]),
+    ("ai_esg_extract", "/ai-extract", ["AI ESG Extraction"]),
+    ("compliance", "/compliance", ["Compliance"]),
+    ("kpi_benchmark", "/kpi", ["KPI Benchmarking"]),
+    ("use_of_proceeds", "/use-of-proceeds", ["Use of Proceeds"]),
+    ("kpi_evaluation", "/kpi", ["KPI Evaluation"]),
+    ("kpi_benchmarking", None, None),  # KPI Benchmarking Engine (uses /kpi-benchmark prefix)
+    ("report_chat", None, None),
+]
+
 
+def _include_routers(app: FastAPI):
+    """Import and mount the API routers (once per app)."""
+    if getattr(app.state, "routers_included", False):
+        return
+    for name, prefix, tags in _ROUTERS:
+        router = importlib.import_module(f"app.routers.{name}").router
+        kwargs = {}
+        if prefix is not None:
+            kwargs["prefix"] = prefix
+        if tags is not None:
+            kwargs["tags"] = tags
+        app.include_router(router, **kwargs)
+    app.state.routers_included = True
 
+
+_include_routers(app)
+
+
+_ROOT_STATUS = {"name": settings.APP_NAME, "version": settings.APP_VERSION, "status": "healthy"}
+_HEALTH_STATUS = {"status": "healthy", "database": "connected"}
+
+
+# Served by HealthProbeMiddleware below; the routes remain for the OpenAPI docs
 @app.get("/", tags=["Health"])
 async def root():
-    return {"name": settings.APP_NAME, "version": settings.APP_VERSION, "status": "healthy"}
+    return _ROOT_STATUS
 
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    return _HEALTH_STATUS
+
+
+# Outermost middleware: liveness probes skip CORS, exception handling and routing
+app.add_middleware(HealthProbeMiddleware, responses={"/": _ROOT_STATUS, "/health": _HEALTH_STATUS})
@@ -1,13 +1,13 @@
 """
-Middleware to check critical configuration on startup.
+Check critical configuration once per process, when this module is first imported
+(from the application lifespan).
 """
 import logging
-from fastapi import FastAPI
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-def check_configuration():
+def _run_checks() -> bool:
     """Check critical configuration and log warnings."""
     issues = []
     warnings = []
@@ -63,8 +63,10 @@ def check_configuration():
     
     return len(issues) == 0
 
-def add_config_check_middleware(app: FastAPI):
-    """Add configuration check to FastAPI app startup."""
-    @app.on_event("startup")
-    async def startup_config_check():
-        check_configuration()
+# Settings are fixed for the process, so the checks (and their log output) run once
+CONFIG_OK = _run_checks()
+
+
+def check_configuration() -> bool:
+    """Return the cached configuration check result."""
+    return CONFIG_OK
@@ -0,0 +1,34 @@
+"""
+Fast path for liveness probes.
+
+Answers GET/HEAD on the probe paths with a prebuilt JSON body before the
+request reaches CORS, the exception handlers or the router. Install it as
+the outermost middleware (added last).
+"""
+from typing import Dict, Tuple
+
+import orjson
+
+_HEADERS = [(b"content-type", b"application/json")]
+
+
+class HealthProbeMiddleware:
+    """Pure ASGI middleware serving fixed JSON bodies for probe paths."""
+
+    def __init__(self, app, responses: Dict[str, dict]):
+        self.app = app
+        # path -> (body, headers), serialized once
+        self._responses: Dict[str, Tuple[bytes, list]] = {}
+        for path, payload in responses.items():
+            body = orjson.dumps(payload)
+            self._responses[path] = (body, _HEADERS + [(b"content-length", str(len(body)).encode())])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            response = self._responses.get(scope["path"])
+            if response is not None:
+                body, headers = response
+                await send({"type": "http.response.start", "status": 200, "headers": headers})
+                await send({"type": "http.response.body", "body": body if scope["method"] == "GET" else b""})
+                return
+        await self.app(scope, receive, send)
@@ -2,20 +2,20 @@
 GreenGuard ESG Platform - Models Package
 """
 from app.models.user import User, UserRole
-from app.models.document import Document, FileType
+from app.models.document import Document
 from app.models.esg_report import ESGReport
 from app.models.transaction import Transaction
-from app.models.kpi import KPIBenchmark, GreenVendor, KPIEvaluation, KPIEvaluationDocument, KPIEvaluationResult, AIAuditLog
+from app.models.kpi import KPIBenchmark, GreenVendor, KPIEvaluation, KPIEvaluationDocument, AIAuditLog
 from app.models.document_embedding import DocumentChunk
 from app.models.report_chat import ReportChatSession, ReportChatMessage
 
 __all__ = [
     "User", "UserRole",
-    "Document", "FileType",
+    "Document",
     "ESGReport",
     "Transaction",
     "KPIBenchmark", "GreenVendor",
-    "KPIEvaluation", "KPIEvaluationDocument", "KPIEvaluationResult", "AIAuditLog",
+    "KPIEvaluation", "KPIEvaluationDocument", "AIAuditLog",
     "DocumentChunk",
     "ReportChatSession", "ReportChatMessage",
 ]
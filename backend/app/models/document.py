@@ -1,21 +1,19 @@
 """
 GreenGuard ESG Platform - Document Model
 """
-from datetime import datetime
-from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
-class FileType(str, PyEnum):
-    PDF = "pdf"
-    IMAGE = "image"
-
-
 class Document(Base):
     """Document database model for uploaded files."""
     __tablename__ = "documents"
+    # Uploads are stored as "pdf" or "image"
+    __table_args__ = (
+        CheckConstraint("file_type IN ('pdf', 'image')", name="file_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -25,13 +23,21 @@ class Document(Base):
     file_size = Column(Integer)
     extracted_text = Column(Text)
     extraction_status = Column(String(50), default="pending")
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="documents")
     esg_reports = relationship("ESGReport", back_populates="document", cascade="all, delete-orphan")
-    chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
+    # Chunks come back in document order; the FK's ON DELETE CASCADE removes them, so
+    # deleting a document doesn't first load every chunk row
+    chunks = relationship(
+        "DocumentChunk",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        order_by="DocumentChunk.chunk_index",
+        passive_deletes=True
+    )
     
     def __repr__(self):
         return f"<Document(id={self.id}, name='{self.file_name}')>"
@@ -1,10 +1,9 @@
 """
 GreenGuard ESG Platform - Document Embedding Model
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import ARRAY
 from app.database import Base
 
 
@@ -18,7 +17,7 @@ class DocumentChunk(Base):
     chunk_text = Column(Text, nullable=False)
     embedding_id = Column(String(255))  # Reference to Supabase vector store
     token_count = Column(Integer)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     document = relationship("Document", back_populates="chunks")
@@ -1,8 +1,8 @@
 """
 GreenGuard ESG Platform - ESG Report Model
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, JSON, Index, text
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -10,9 +10,19 @@ from app.database import Base
 class ESGReport(Base):
     """ESG Report database model."""
     __tablename__ = "esg_reports"
+    # Report lists filter by user and sort by generated_at; also covers user_id lookups
+    __table_args__ = (
+        Index("ix_esg_user_gen", "user_id", "generated_at"),
+        # Compliance alerts: a user's newest reports scoring below 60
+        Index(
+            "ix_esg_user_gen_alert", "user_id", "generated_at",
+            postgresql_where=text("overall_compliance_score < 60"),
+            sqlite_where=text("overall_compliance_score < 60"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # ESG Metrics
@@ -36,8 +46,8 @@ class ESGReport(Base):
     
     # Status
     report_status = Column(String(50), default="generated")
-    generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="esg_reports")
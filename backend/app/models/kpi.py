@@ -1,18 +1,24 @@
 """
 GreenGuard ESG Platform - KPI and Green Vendor Models
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text, UniqueConstraint, Index, JSON, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func
 from app.database import Base
 
 
 class KPIBenchmark(Base):
     """KPI Benchmark database model."""
     __tablename__ = "kpi_benchmarks"
+    # Lookups are always by (sector, metric); one composite index serves them
+    __table_args__ = (
+        Index("ix_kpi_bench_sector_metric", "sector", "metric", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    sector = Column(String(100), nullable=False, index=True)
-    metric = Column(String(100), nullable=False, index=True)
+    sector = Column(String(100), nullable=False)
+    metric = Column(String(100), nullable=False)
     target_low = Column(Float, nullable=False)
     target_medium = Column(Float, nullable=False)
     target_high = Column(Float, nullable=False)
@@ -20,13 +26,17 @@ class KPIBenchmark(Base):
     description = Column(String(500))
     source_url = Column(String(500))
     effective_date = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class GreenVendor(Base):
     """Approved green vendor database model."""
     __tablename__ = "green_vendors"
+    # Vendor lookups only consider active vendors, usually by category
+    __table_args__ = (
+        Index("ix_vendor_active_cat", "category", postgresql_where=text("is_active"), sqlite_where=text("is_active")),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     vendor_name = Column(String(255), nullable=False, index=True)
@@ -34,15 +44,19 @@ class GreenVendor(Base):
     category = Column(String(100))
     certification = Column(String(255))
     certification_expiry = Column(DateTime)
-    is_active = Column(Integer, default=1)
+    is_active = Column(Boolean, default=True, nullable=False)
     risk_level = Column(String(20), default="low")
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class KPIEvaluation(Base):
     """KPI Evaluation request and summary."""
     __tablename__ = "kpi_evaluations"
+    # Evaluation history is listed newest first
+    __table_args__ = (
+        Index("ix_kpi_eval_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     loan_reference_id = Column(String(100), nullable=False)
@@ -73,44 +87,44 @@ class KPIEvaluation(Base):
     assessment_grade = Column(String(20))  # WEAK, MODERATE, AMBITIOUS
     success_probability = Column(Float)
     needs_review = Column(Boolean, default=False)  # PostgreSQL Boolean
+    # Full result dict; deferred so list queries don't load it (undefer() where needed)
+    result_json = deferred(Column(JSON().with_variant(JSONB, "postgresql")))
     
     # Banker Decision
     banker_decision = Column(String(50), default="PENDING")
     banker_override_reason = Column(Text)
     
     created_by_user_id = Column(Integer)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class KPIEvaluationDocument(Base):
     """Link between Evaluation and uploaded Documents."""
     __tablename__ = "kpi_evaluation_documents"
+    # The composite PK is led by evaluation_id; this covers reverse lookups by document
+    __table_args__ = (
+        Index("ix_kpi_evaldoc_doc", "document_id"),
+    )
     
     evaluation_id = Column(Integer, primary_key=True)
     document_id = Column(Integer, primary_key=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-
-class KPIEvaluationResult(Base):
-    """Detailed full JSON result of an evaluation."""
-    __tablename__ = "kpi_evaluation_results"
-    
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    evaluation_id = Column(Integer, index=True, unique=True, nullable=False)  # One result per evaluation
-    result_json = Column(Text, nullable=False)  # Use Text for large JSON (no size limit)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class AIAuditLog(Base):
     """Audit log for AI operations."""
     __tablename__ = "ai_audit_logs"
+    # Audit views list one evaluation's entries in time order
+    __table_args__ = (
+        Index("ix_ai_audit_eval_time", "evaluation_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    evaluation_id = Column(Integer, index=True)
+    evaluation_id = Column(Integer)
     action_type = Column(String(50), nullable=False) # EXTRACT, BENCHMARK, SCORE, LLM_GENERATE
     model_provider = Column(String(50))
-    input_snapshot = Column(String) # JSON string
-    output_snapshot = Column(String) # JSON string
+    input_snapshot = Column(JSON().with_variant(JSONB, "postgresql"))
+    output_snapshot = Column(JSON().with_variant(JSONB, "postgresql"))
     latency_ms = Column(Integer)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
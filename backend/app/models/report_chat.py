@@ -6,9 +6,10 @@ LLM is used only to explain/summarize based on provided evidence.
 Deterministic scoring/approval logic remains unchanged.
 """
 
-from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -35,8 +36,8 @@ class ReportChatSession(Base):
 
     title = Column(String(255))
 
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     messages = relationship(
         "ReportChatMessage",
@@ -51,21 +52,24 @@ class ReportChatMessage(Base):
     """A single message in a report chat session."""
 
     __tablename__ = "report_chat_messages"
+    # History is read as WHERE session_id = ? ORDER BY created_at
+    __table_args__ = (
+        Index("ix_rcm_session_created", "session_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     session_id = Column(
         Integer,
         ForeignKey("report_chat_sessions.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
     role = Column(String(20), nullable=False)  # system|user|assistant
     content = Column(Text, nullable=False)
 
-    # JSON string (list of citations) for audit + UI.
-    citations_json = Column(Text)
+    # List of citations for audit + UI.
+    citations_json = Column(JSON().with_variant(JSONB, "postgresql"))
 
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     session = relationship("ReportChatSession", back_populates="messages")
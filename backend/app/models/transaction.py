@@ -1,8 +1,8 @@
 """
 GreenGuard ESG Platform - Transaction Model
 """
-from datetime import datetime
 from sqlalchemy import Column, Integer, Float, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
 from app.database import Base
 
 
@@ -30,8 +30,8 @@ class Transaction(Base):
     verified_by = Column(Integer)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     def __repr__(self):
         return f"<Transaction(id={self.id}, vendor='{self.vendor_name}', amount={self.amount})>"
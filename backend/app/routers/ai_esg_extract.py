@@ -7,6 +7,7 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import load_only
 from pydantic import BaseModel
 
 from app.database import get_db
@@ -67,7 +68,9 @@ async def extract_esg_with_ai(
     """
     # Fetch document
     result = await db.execute(
-        select(Document).where(
+        select(Document)
+        .options(load_only(Document.id, Document.user_id, Document.extraction_status, Document.extracted_text, Document.updated_at))
+        .where(
             Document.id == document_id,
             Document.user_id == current_user.id
         )
@@ -112,7 +115,7 @@ async def extract_esg_with_ai(
         try:
             # Perform AI analysis
             logger.info(f"Starting AI ESG analysis for document {document_id}")
-            analysis = await ai_esg_service.analyze_document(document_id, text)
+            analysis = await ai_esg_service.analyze_document(document_id, text, document.updated_at)
             
             if "error" in analysis:
                 error_detail = analysis.get('error')
@@ -165,8 +168,8 @@ async def extract_esg_with_ai(
         report_status="generated"
     )
     db.add(report)
+    # The INSERT returns id and generated_at (eager_defaults), so no refresh SELECT is needed
     await db.commit()
-    await db.refresh(report)
     
     logger.info(f"AI ESG report generated for document {document_id}, report_id={report.id}")
     
@@ -200,7 +203,10 @@ async def ask_document(
     """
     # Verify document access
     result = await db.execute(
-        select(Document).where(
+        # Access check and cache revision only; the text is searched through its stored embeddings
+        select(Document)
+        .options(load_only(Document.id, Document.updated_at))
+        .where(
             Document.id == document_id,
             Document.user_id == current_user.id
         )
@@ -220,7 +226,7 @@ async def ask_document(
         )
     
     try:
-        answer = await ai_esg_service.ask_document(document_id, request.question)
+        answer = await ai_esg_service.ask_document(document_id, request.question, document.updated_at)
         return DocumentQAResponse(
             document_id=document_id,
             question=request.question,
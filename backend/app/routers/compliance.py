@@ -4,7 +4,7 @@ GreenGuard ESG Platform - Compliance Router
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 
 from app.database import get_db
 from app.models.esg_report import ESGReport
@@ -67,24 +67,22 @@ async def get_compliance_summary(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    score = ESGReport.overall_compliance_score
+    # Aggregated in the database; missing and zero scores are left out of the average
     result = await db.execute(
-        select(ESGReport)
-        .where(ESGReport.user_id == current_user.id)
-        .order_by(ESGReport.generated_at.desc())
+        select(
+            func.count(ESGReport.id),
+            func.avg(func.nullif(score, 0)),
+            func.count().filter(score >= 60),
+        ).where(ESGReport.user_id == current_user.id)
     )
-    reports = result.scalars().all()
-    
-    if not reports:
-        return {"total_reports": 0, "avg_score": 0, "compliant": 0, "non_compliant": 0}
-    
-    scores = [r.overall_compliance_score for r in reports if r.overall_compliance_score]
-    compliant = sum(1 for s in scores if s >= 60)
+    total, avg_score, compliant = result.one()
     
     return {
-        "total_reports": len(reports),
-        "avg_score": sum(scores) / len(scores) if scores else 0,
+        "total_reports": total,
+        "avg_score": float(avg_score) if avg_score is not None else 0,
         "compliant": compliant,
-        "non_compliant": len(reports) - compliant
+        "non_compliant": total - compliant
     }
 
 
@@ -93,8 +91,14 @@ async def get_compliance_alerts(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    # Only the columns the alert needs; raw_metrics can be a large JSON blob
     result = await db.execute(
-        select(ESGReport)
+        select(
+            ESGReport.id,
+            ESGReport.overall_compliance_score,
+            ESGReport.red_flags,
+            ESGReport.generated_at,
+        )
         .where(
             ESGReport.user_id == current_user.id,
             ESGReport.overall_compliance_score < 60
@@ -102,7 +106,7 @@ async def get_compliance_alerts(
         .order_by(ESGReport.generated_at.desc())
         .limit(10)
     )
-    reports = result.scalars().all()
+    reports = result.all()
     
     alerts = []
     for r in reports:
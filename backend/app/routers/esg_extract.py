@@ -5,6 +5,8 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from pydantic import TypeAdapter
 
 from app.database import get_db
 from app.models.document import Document
@@ -18,6 +20,18 @@ from app.utils.jwt_handler import get_current_user
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+_METRIC_FIELDS = ("carbon_emissions", "energy_usage", "renewable_percentage", "water_usage", "waste_recycled")
+_SCORE_FIELDS = ("carbon_score", "energy_efficiency_score", "taxonomy_alignment_score", "overall_compliance_score")
+# Columns needed by ESGReportResponse (everything except updated_at)
+_REPORT_LIST_COLUMNS = [
+    getattr(ESGReport, name) for name in (
+        "id", "user_id", "document_id", *_METRIC_FIELDS, *_SCORE_FIELDS,
+        "detected_keywords", "raw_metrics", "red_flags", "recommendations",
+        "report_status", "generated_at",
+    )
+]
+_REPORT_LIST_ADAPTER = TypeAdapter(list[ESGReportResponse])
+
 
 @router.post("/esg/{document_id}", response_model=ESGExtractionResponse)
 async def extract_esg_data(
@@ -26,7 +40,9 @@ async def extract_esg_data(
     current_user: User = Depends(get_current_user)
 ):
     result = await db.execute(
-        select(Document).where(
+        select(Document)
+        .options(load_only(Document.id, Document.user_id, Document.extraction_status, Document.extracted_text))
+        .where(
             Document.id == document_id,
             Document.user_id == current_user.id
         )
@@ -70,8 +86,8 @@ async def extract_esg_data(
         report_status="generated"
     )
     db.add(report)
+    # The INSERT returns id and generated_at (eager_defaults), so no refresh SELECT is needed
     await db.commit()
-    await db.refresh(report)
     
     logger.info(f"ESG report generated for document {document_id}")
     
@@ -98,39 +114,27 @@ async def list_reports(
     current_user: User = Depends(get_current_user)
 ):
     result = await db.execute(
-        select(ESGReport)
+        select(*_REPORT_LIST_COLUMNS)
         .where(ESGReport.user_id == current_user.id)
         .order_by(ESGReport.generated_at.desc())
     )
-    reports = result.scalars().all()
-    
-    response = []
-    for r in reports:
-        response.append(ESGReportResponse(
-            id=r.id,
-            user_id=r.user_id,
-            document_id=r.document_id,
-            metrics=ESGMetrics(
-                carbon_emissions=r.carbon_emissions,
-                energy_usage=r.energy_usage,
-                renewable_percentage=r.renewable_percentage,
-                water_usage=r.water_usage,
-                waste_recycled=r.waste_recycled
-            ),
-            scores=ESGScores(
-                carbon_score=r.carbon_score,
-                energy_efficiency_score=r.energy_efficiency_score,
-                taxonomy_alignment_score=r.taxonomy_alignment_score,
-                overall_compliance_score=r.overall_compliance_score
-            ),
-            detected_keywords=r.detected_keywords or [],
-            raw_metrics=r.raw_metrics or {},
-            red_flags=r.red_flags or [],
-            recommendations=r.recommendations,
-            report_status=r.report_status,
-            generated_at=r.generated_at
-        ))
-    return response
+    # Plain rows (no ORM instances), validated in one call
+    return _REPORT_LIST_ADAPTER.validate_python([
+        {
+            "id": r["id"],
+            "user_id": r["user_id"],
+            "document_id": r["document_id"],
+            "metrics": {k: r[k] for k in _METRIC_FIELDS},
+            "scores": {k: r[k] for k in _SCORE_FIELDS},
+            "detected_keywords": r["detected_keywords"] or [],
+            "raw_metrics": r["raw_metrics"] or {},
+            "red_flags": r["red_flags"] or [],
+            "recommendations": r["recommendations"],
+            "report_status": r["report_status"],
+            "generated_at": r["generated_at"],
+        }
+        for r in result.mappings()
+    ])
 
 
 @router.get("/report/{report_id}", response_model=ESGReportResponse)
@@ -8,6 +8,7 @@ from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import load_only
 
 from app.database import get_db
 from app.models.document import Document
@@ -98,7 +99,11 @@ async def extract_text_background(document_id: int, file_path: str, file_type: s
             if db:
                 await db.close()
                 db = AsyncSessionLocal()
-            result = await db.execute(select(Document).where(Document.id == document_id))
+            result = await db.execute(
+                select(Document)
+                .options(load_only(Document.id, Document.extraction_status))
+                .where(Document.id == document_id)
+            )
             doc = result.scalar_one_or_none()
             if doc:
                 doc.extraction_status = "failed"
@@ -3,7 +3,6 @@ GreenGuard ESG Platform - KPI Benchmarking Router
 Complete API for KPI target assessment, peer benchmarking, and report generation.
 """
 import logging
-import json
 import uuid
 from typing import List, Optional
 from datetime import datetime
@@ -12,6 +11,7 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
+from sqlalchemy.orm import undefer
 from io import BytesIO
 
 from app.database import get_db
@@ -26,7 +26,7 @@ from app.services.ai_summary_service import ai_summary_service
 from app.services.csrd_analyzer_service import csrd_analyzer_service
 from app.services.taxonomy_service import taxonomy_service
 from app.services.embedding_service import embedding_service
-from app.models.kpi import KPIEvaluation, KPIEvaluationResult, KPIEvaluationDocument
+from app.models.kpi import KPIEvaluation, KPIEvaluationDocument
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/kpi-benchmark", tags=["KPI Benchmarking"])
@@ -362,28 +362,14 @@ async def _save_evaluation_to_db(
         result_summary=result.get("executive_summary", {}).get("recommendation_rationale", "")[:500] if result.get("executive_summary") else None,
         assessment_grade=result.get("peer_benchmarking", {}).get("ambition_classification", {}).get("level", "UNKNOWN"),
         banker_decision=result.get("final_decision", {}).get("recommendation", "PENDING"),
+        # Full JSON (serialized by the engine's json_serializer)
+        result_json=result,
     )
     
     db.add(evaluation)
     await db.flush()  # Get the ID
     logger.info(f"Created evaluation record with ID: {evaluation.id}")
     
-    # Serialize result to JSON - ensure it's valid
-    try:
-        result_json_str = json.dumps(result, default=str, ensure_ascii=False)
-        json_size_kb = len(result_json_str) / 1024
-        logger.info(f"Result JSON size: {json_size_kb:.2f} KB")
-    except Exception as json_err:
-        logger.error(f"Failed to serialize result JSON: {json_err}")
-        raise ValueError(f"Result serialization failed: {json_err}")
-    
-    # Create result record with full JSON
-    eval_result = KPIEvaluationResult(
-        evaluation_id=evaluation.id,
-        result_json=result_json_str,
-    )
-    db.add(eval_result)
-    
     # Link documents
     for doc_id in doc_ids:
         doc_link = KPIEvaluationDocument(
@@ -463,9 +449,11 @@ async def get_evaluation_by_id(
     try:
         logger.info(f"Loading evaluation {evaluation_id} from database")
         
-        # Get evaluation
+        # Get evaluation with its full result JSON
         eval_result = await db.execute(
-            select(KPIEvaluation).where(KPIEvaluation.id == evaluation_id)
+            select(KPIEvaluation)
+            .options(undefer(KPIEvaluation.result_json))
+            .where(KPIEvaluation.id == evaluation_id)
         )
         evaluation = eval_result.scalar_one_or_none()
         
@@ -475,20 +463,9 @@ async def get_evaluation_by_id(
         
         logger.info(f"Found evaluation for {evaluation.company_name}")
         
-        # Get full result JSON
-        result_query = await db.execute(
-            select(KPIEvaluationResult).where(KPIEvaluationResult.evaluation_id == evaluation_id)
-        )
-        result_record = result_query.scalar_one_or_none()
-        
         full_result = None
-        if result_record and result_record.result_json:
-            try:
-                full_result = json.loads(result_record.result_json)
-                logger.info(f"Successfully parsed result JSON for evaluation {evaluation_id}")
-            except json.JSONDecodeError as json_err:
-                logger.error(f"Failed to parse result JSON for evaluation {evaluation_id}: {json_err}")
-                full_result = None
+        if evaluation.result_json:
+            full_result = evaluation.result_json
         else:
             logger.warning(f"No result_json found for evaluation {evaluation_id}")
         
@@ -545,7 +522,6 @@ async def update_banker_decision(
         
         evaluation.banker_decision = decision
         evaluation.banker_override_reason = override_reason
-        evaluation.updated_at = datetime.utcnow()
         
         await db.commit()
         
@@ -1247,28 +1223,21 @@ async def generate_pdf_from_saved(
     Much faster than /evaluate/pdf for already-completed evaluations.
     """
     try:
-        # Get evaluation
+        # Get evaluation with its full result JSON
         eval_result = await db.execute(
-            select(KPIEvaluation).where(KPIEvaluation.id == evaluation_id)
+            select(KPIEvaluation)
+            .options(undefer(KPIEvaluation.result_json))
+            .where(KPIEvaluation.id == evaluation_id)
         )
         evaluation = eval_result.scalar_one_or_none()
         
         if not evaluation:
             raise HTTPException(status_code=404, detail="Evaluation not found")
         
-        # Get full result JSON
-        result_query = await db.execute(
-            select(KPIEvaluationResult).where(KPIEvaluationResult.evaluation_id == evaluation_id)
-        )
-        result_record = result_query.scalar_one_or_none()
-        
-        if not result_record or not result_record.result_json:
+        if not evaluation.result_json:
             raise HTTPException(status_code=404, detail="Evaluation result not found. Please re-run the evaluation.")
         
-        try:
-            full_result = json.loads(result_record.result_json)
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=500, detail="Failed to parse saved evaluation result")
+        full_result = evaluation.result_json
         
         # Generate PDF from saved result
         pdf_bytes = banker_report_service.generate_pdf(full_result)
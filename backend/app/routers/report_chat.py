@@ -8,7 +8,6 @@ Endpoints are consumed by the desktop UI:
 - POST /report-chat/session/{session_id}/message
 """
 
-import json
 import logging
 from typing import Any, Dict, List, Optional
 
@@ -32,11 +31,11 @@ router = APIRouter(prefix="/report-chat", tags=["Report Chat"])
 logger = logging.getLogger(__name__)
 
 
-def _parse_citations(citations_json: Optional[str]) -> List[ReportChatCitation]:
+def _parse_citations(citations_json: Optional[List[Any]]) -> List[ReportChatCitation]:
     if not citations_json:
         return []
     try:
-        data = json.loads(citations_json)
+        data = citations_json
         if not isinstance(data, list):
             return []
         out: List[ReportChatCitation] = []
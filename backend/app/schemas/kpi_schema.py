@@ -48,7 +48,7 @@ class GreenVendorResponse(BaseModel):
     vendor_id: Optional[str] = None
     category: Optional[str] = None
     certification: Optional[str] = None
-    is_active: int
+    is_active: bool
     risk_level: str
     
     class Config:
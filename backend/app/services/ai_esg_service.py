@@ -5,9 +5,11 @@ Uses Perplexity AI for intelligent ESG analysis with RAG.
 import json
 import logging
 import httpx
+from datetime import datetime
 from typing import Dict, Any, List, Optional
 from app.config import settings
 from app.services.embedding_service import embedding_service
+from app.services.analysis_cache import esg_analysis_cache, document_qa_cache, analysis_scope
 
 logger = logging.getLogger(__name__)
 
@@ -160,7 +162,8 @@ class AIESGService:
     async def analyze_document(
         self, 
         document_id: int, 
-        full_text: str
+        full_text: str,
+        updated_at: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """
         Perform comprehensive ESG analysis on a document.
@@ -168,6 +171,7 @@ class AIESGService:
         Args:
             document_id: Document ID
             full_text: Full document text
+            updated_at: Document revision timestamp, part of the cache key
             
         Returns:
             ESG analysis results
@@ -175,6 +179,12 @@ class AIESGService:
         logger.info(f"Starting AI ESG analysis for document {document_id}")
         logger.info(f"Document text length: {len(full_text)} characters")
         
+        scope = analysis_scope(document_id, updated_at)
+        cached, cache_state = await esg_analysis_cache.get("esg_analysis", scope, full_text)
+        if cached is not None:
+            logger.info(f"[CACHE] Reusing ESG analysis for document {document_id}")
+            return cached
+        
         # If text is very long, use the most relevant chunks via RAG
         if len(full_text) > 15000:
             logger.info(f"Text > 15000 chars, using RAG vector search for document {document_id}")
@@ -220,12 +230,14 @@ class AIESGService:
             return {"error": "Failed to parse analysis", "raw_response": response}
         
         logger.info(f"[SUCCESS] AI ESG analysis complete for document {document_id}")
+        esg_analysis_cache.put("esg_analysis", scope, cache_state, analysis)
         return analysis
     
     async def ask_document(
         self, 
         document_id: int, 
-        question: str
+        question: str,
+        updated_at: Optional[datetime] = None
     ) -> str:
         """
         Answer a question about a document using RAG.
@@ -233,10 +245,17 @@ class AIESGService:
         Args:
             document_id: Document ID
             question: User's question
+            updated_at: Document revision timestamp, part of the cache key
             
         Returns:
             Answer based on document content
         """
+        scope = analysis_scope(document_id, updated_at)
+        cached, cache_state = await document_qa_cache.get("document_qa", scope, question)
+        if cached is not None:
+            logger.info(f"[CACHE] Reusing answer for document {document_id}")
+            return cached
+        
         # Search for relevant chunks
         try:
             relevant_chunks = embedding_service.search_similar(
@@ -263,6 +282,7 @@ class AIESGService:
         # Call Perplexity
         answer = await self._call_perplexity(messages, temperature=0.3)
         
+        document_qa_cache.put("document_qa", scope, cache_state, answer)
         return answer
     
     def calculate_scores_from_analysis(
@@ -0,0 +1,28 @@
+"""
+GreenGuard ESG Platform - AI ESG Analysis Cache
+Reuses analyses and Q&A answers for unchanged documents instead of calling Perplexity again.
+
+Both caches are partitioned per model, document and document revision, so a hit
+never returns another document's figures. Keys are built from the raw text: memory
+context normalization would strip dates and reorder lines, which are content here.
+Both match the exact text (or question) only: within one revision the extracted
+text cannot change, so a semantic tier could never hit and would only add an
+embedding call to every miss.
+"""
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+from app.core.semantic_cache import SemanticCache
+
+# Full ESG analysis dicts, keyed by the document's extracted text
+esg_analysis_cache = SemanticCache(ttl_seconds=24 * 3600, max_entries=256, normalize=False, semantic=False)
+
+# Document Q&A answers, keyed by the question
+document_qa_cache = SemanticCache(ttl_seconds=3600, max_entries=1024, normalize=False, semantic=False)
+
+
+def analysis_scope(document_id: int, updated_at: Optional[datetime] = None) -> str:
+    """Cache partition for one revision of a document under the configured model."""
+    revision = updated_at.isoformat() if updated_at else ""
+    return f"{settings.PERPLEXITY_MODEL}:{document_id}:{revision}"
@@ -4,13 +4,25 @@ Handles text chunking, embedding generation using Voyage AI, and vector storage
 """
 import logging
 import hashlib
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
+import numpy as np
 import voyageai
 from supabase import create_client, Client
 from app.config import settings
 
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# In-process embedding cache size (entries); the disk tier is unbounded by count
+EMBEDDING_MEMORY_CACHE_SIZE = 8192
+
 
 class EmbeddingService:
     """Service for generating and managing document embeddings using Voyage AI."""
@@ -18,6 +30,58 @@ class EmbeddingService:
     def __init__(self):
         self._voyage_client: Optional[voyageai.Client] = None
         self._supabase_client: Optional[Client] = None
+        # Embeddings are cached as float32 bytes; misses return the same float32-rounded
+        # values, so a text embeds identically whether or not it was cached.
+        # Guarded by a lock: lookups run in asyncio.to_thread workers
+        self._embedding_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        self._disk_cache = None
+        if DISKCACHE_AVAILABLE and settings.EMBEDDING_CACHE_DIR:
+            try:
+                self._disk_cache = diskcache.Cache(settings.EMBEDDING_CACHE_DIR)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache unavailable: {e}")
+    
+    def _embedding_cache_key(self, text: str, input_type: str) -> str:
+        """Cache key covering everything that changes the vector."""
+        raw = f"f32|{settings.VOYAGE_EMBEDDING_MODEL}|{settings.EMBEDDING_DIMENSION}|{input_type}|{text}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    def _get_cached_embedding(self, key: str) -> Optional[List[float]]:
+        """Look up an embedding in memory, then on disk."""
+        with self._embedding_cache_lock:
+            buf = self._embedding_cache.get(key)
+            if buf is not None:
+                self._embedding_cache.move_to_end(key)
+        if buf is None and self._disk_cache is not None:
+            try:
+                buf = self._disk_cache.get(key)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+                buf = None
+            if buf is not None:
+                self._remember_embedding(key, buf, persist=False)
+        if buf is None:
+            return None
+        return np.frombuffer(buf, dtype=np.float32).tolist()
+    
+    def _remember_embedding(self, key: str, buf: bytes, persist: bool = True):
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = buf
+            self._embedding_cache.move_to_end(key)
+            while len(self._embedding_cache) > EMBEDDING_MEMORY_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        if persist and self._disk_cache is not None:
+            try:
+                self._disk_cache.set(key, buf)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+    
+    def _cache_embedding(self, key: str, embedding: List[float]) -> List[float]:
+        """Cache an embedding and return it rounded to float32, exactly as a hit would."""
+        arr = np.asarray(embedding, dtype=np.float32)
+        self._remember_embedding(key, arr.tobytes())
+        return arr.tolist()
     
     @property
     def voyage_client(self) -> voyageai.Client:
@@ -121,6 +185,12 @@ class EmbeddingService:
             logger.error("Cannot generate embedding for empty text")
             raise ValueError("Text cannot be empty")
         
+        cache_key = self._embedding_cache_key(text, input_type)
+        cached = self._get_cached_embedding(cache_key)
+        if cached is not None:
+            logger.debug(f"Embedding cache hit for text of length {len(text)}")
+            return cached
+        
         logger.debug(f"Generating embedding for text of length {len(text)}")
         
         try:
@@ -131,7 +201,7 @@ class EmbeddingService:
                 output_dimension=settings.EMBEDDING_DIMENSION
             )
             logger.debug(f"Successfully generated embedding with dimension {len(result.embeddings[0])}")
-            return result.embeddings[0]
+            return self._cache_embedding(cache_key, result.embeddings[0])
         except Exception as e:
             logger.error(f"Error generating embedding: {type(e).__name__}: {str(e)}")
             raise
@@ -166,14 +236,21 @@ class EmbeddingService:
         
         logger.info(f"Generating embeddings for {len(valid_texts)} texts using model {settings.VOYAGE_EMBEDDING_MODEL}")
         
+        # Serve repeated chunks (e.g. re-uploaded documents) from the cache
+        cache_keys = [self._embedding_cache_key(t, input_type) for t in valid_texts]
+        all_embeddings: List[Optional[List[float]]] = [self._get_cached_embedding(k) for k in cache_keys]
+        missing = [i for i, emb in enumerate(all_embeddings) if emb is None]
+        if len(missing) < len(valid_texts):
+            logger.info(f"Embedding cache served {len(valid_texts) - len(missing)}/{len(valid_texts)} texts")
+        
         try:
             # Voyage AI supports up to 1000 texts per batch
             # Process in batches of 128 for efficiency
             batch_size = 128
-            all_embeddings = []
             
-            for i in range(0, len(valid_texts), batch_size):
-                batch = valid_texts[i:i + batch_size]
+            for i in range(0, len(missing), batch_size):
+                batch_idx = missing[i:i + batch_size]
+                batch = [valid_texts[j] for j in batch_idx]
                 logger.debug(f"Processing batch {i//batch_size + 1} with {len(batch)} texts")
                 
                 result = self.voyage_client.embed(
@@ -182,8 +259,9 @@ class EmbeddingService:
                     input_type=input_type,
                     output_dimension=settings.EMBEDDING_DIMENSION
                 )
-                all_embeddings.extend(result.embeddings)
-                logger.info(f"Generated embeddings for batch {i//batch_size + 1}/{(len(valid_texts) + batch_size - 1)//batch_size}")
+                for j, embedding in zip(batch_idx, result.embeddings):
+                    all_embeddings[j] = self._cache_embedding(cache_keys[j], embedding)
+                logger.info(f"Generated embeddings for batch {i//batch_size + 1}/{(len(missing) + batch_size - 1)//batch_size}")
             
             logger.info(f"Successfully generated {len(all_embeddings)} embeddings")
             return all_embeddings
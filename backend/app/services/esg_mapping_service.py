@@ -23,6 +23,13 @@ METRIC_PATTERNS = {
     "water_usage": r"(?:water)[:\s]*(\d+[\d,\.]*)\s*(?:m3|liters?|gallons?|ml)",
     "waste_recycled": r"(?:recycl\w*|waste diverted)[:\s]*(\d+[\d,\.]*)\s*%?"
 }
+# Compiled once at import
+_METRIC_RES = [(metric, re.compile(pattern)) for metric, pattern in METRIC_PATTERNS.items()]
+
+RED_FLAG_PATTERNS = (
+    "not disclosed", "data unavailable", "no targets set",
+    "pending verification", "significant increase", "non-compliance"
+)
 
 
 class ESGMappingService:
@@ -33,8 +40,8 @@ class ESGMappingService:
         metrics = {}
         text_lower = text.lower()
         
-        for metric, pattern in METRIC_PATTERNS.items():
-            match = re.search(pattern, text_lower)
+        for metric, pattern in _METRIC_RES:
+            match = pattern.search(text_lower)
             if match:
                 try:
                     value = float(match.group(1).replace(",", ""))
@@ -62,12 +69,7 @@ class ESGMappingService:
         red_flags = []
         text_lower = text.lower()
         
-        flag_patterns = [
-            "not disclosed", "data unavailable", "no targets set",
-            "pending verification", "significant increase", "non-compliance"
-        ]
-        
-        for pattern in flag_patterns:
+        for pattern in RED_FLAG_PATTERNS:
             if pattern in text_lower:
                 red_flags.append(f"Red flag detected: '{pattern}'")
         
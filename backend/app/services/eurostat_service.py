@@ -45,7 +45,7 @@ class EurostatService:
             logging.info(f"Fetching Eurostat data for {nace_code} (timeout: {self.EUROSTAT_TIMEOUT_SECONDS}s)...")
             
             # Run blocking eurostat call in thread pool with timeout
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             try:
                 df = await asyncio.wait_for(
                     loop.run_in_executor(self._executor, self._fetch_eurostat_sync, self.dataset_code),
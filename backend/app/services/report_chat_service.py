@@ -2,7 +2,7 @@
 
 Implements report-scoped banker Q&A using:
 - RAG over borrower document embeddings (Supabase pgvector via embedding_service)
-- Stored report JSON (KPIEvaluationResult.result_json)
+- Stored report JSON (KPIEvaluation.result_json)
 - Perplexity chat completions for natural language responses
 
 Chat history is persisted in DB for auditability.
@@ -19,7 +19,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.models.kpi import KPIEvaluation, KPIEvaluationDocument, KPIEvaluationResult
+from app.models.kpi import KPIEvaluation, KPIEvaluationDocument
 from app.models.report_chat import ReportChatSession, ReportChatMessage
 from app.services.embedding_service import embedding_service
 
@@ -189,13 +189,11 @@ class ReportChatService:
         llm_answer, llm_citations = await self._ask_perplexity(messages_payload)
 
         citations = self._merge_citations(rag_citations, llm_citations)
-        citations_json = json.dumps(citations, ensure_ascii=False)
-
         assistant_msg = ReportChatMessage(
             session_id=session.id,
             role="assistant",
             content=llm_answer,
-            citations_json=citations_json,
+            citations_json=citations,
         )
         db.add(assistant_msg)
         await db.commit()
@@ -204,18 +202,13 @@ class ReportChatService:
 
     async def _load_report_json(self, db: AsyncSession, *, evaluation_id: int) -> str:
         res = await db.execute(
-            select(KPIEvaluationResult).where(KPIEvaluationResult.evaluation_id == evaluation_id)
+            select(KPIEvaluation.result_json).where(KPIEvaluation.id == evaluation_id)
         )
-        rec = res.scalar_one_or_none()
-        if not rec or not rec.result_json:
+        report = res.scalar_one_or_none()
+        if not report:
             return "{}"
         # Keep context bounded.
-        text = rec.result_json
-        try:
-            parsed = json.loads(text)
-            return json.dumps(parsed, ensure_ascii=False, indent=2)[:45000]
-        except Exception:
-            return text[:45000]
+        return json.dumps(report, ensure_ascii=False, indent=2, default=str)[:45000]
 
     async def _load_evaluation_document_ids(self, db: AsyncSession, *, evaluation_id: int) -> List[int]:
         res = await db.execute(
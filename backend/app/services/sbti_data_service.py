@@ -479,16 +479,18 @@ class SBTiDataService:
                 "raw_values": reductions
             }
         
-        # Compute percentiles using numpy
-        arr = np.array(reductions)
+        # Compute percentiles using numpy - one vectorized pass for all quantiles
+        # (min/max are the 0th/100th percentiles) instead of one partition per call
+        arr = np.fromiter(reductions, dtype=np.float64, count=len(reductions))
+        q_min, q25, q50, q75, q_max = np.percentile(arr, [0, 25, 50, 75, 100])
         
         percentiles = {
             "peer_count": len(arr),
-            "min": float(np.min(arr)),
-            "p25": float(np.percentile(arr, 25)),
-            "median": float(np.percentile(arr, 50)),
-            "p75": float(np.percentile(arr, 75)),
-            "max": float(np.max(arr)),
+            "min": float(q_min),
+            "p25": float(q25),
+            "median": float(q50),
+            "p75": float(q75),
+            "max": float(q_max),
             "mean": float(np.mean(arr)),
             "std_dev": float(np.std(arr))
         }
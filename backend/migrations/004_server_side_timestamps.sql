@@ -0,0 +1,72 @@
+-- Migration: Generate created/updated timestamps in the database
+-- The models no longer send created_at/updated_at from Python on INSERT; they rely on
+-- a column DEFAULT. Run this on databases whose tables were created without one.
+-- Safe to re-run: only naive TIMESTAMP columns are converted.
+
+-- Step 1: Store timestamps as timestamptz, matching DateTime(timezone=True) in the models.
+-- Columns created by SQLAlchemy as naive TIMESTAMP held datetime.utcnow() values, so they
+-- are read as UTC. Columns that are already timestamptz (report chat, KPI setup scripts)
+-- are left alone.
+DO $$
+DECLARE
+    col RECORD;
+BEGIN
+    FOR col IN
+        SELECT table_name, column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND data_type = 'timestamp without time zone'
+          AND (table_name, column_name) IN (
+              ('users', 'created_at'), ('users', 'updated_at'),
+              ('documents', 'created_at'), ('documents', 'updated_at'),
+              ('document_chunks', 'created_at'),
+              ('esg_reports', 'generated_at'), ('esg_reports', 'updated_at'),
+              ('transactions', 'created_at'), ('transactions', 'updated_at'),
+              ('kpi_benchmarks', 'created_at'), ('kpi_benchmarks', 'updated_at'),
+              ('green_vendors', 'created_at'), ('green_vendors', 'updated_at'),
+              ('kpi_evaluations', 'created_at'), ('kpi_evaluations', 'updated_at'),
+              ('kpi_evaluation_documents', 'created_at'),
+              ('kpi_evaluation_results', 'created_at'),
+              ('ai_audit_logs', 'timestamp'),
+              ('report_chat_sessions', 'created_at'), ('report_chat_sessions', 'updated_at'),
+              ('report_chat_messages', 'created_at')
+          )
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN %I TYPE TIMESTAMPTZ USING %I AT TIME ZONE ''UTC''',
+            col.table_name, col.column_name, col.column_name
+        );
+    END LOOP;
+END $$;
+
+-- Step 2: Default creation timestamps to NOW()
+ALTER TABLE users ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE users ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE documents ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE documents ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE document_chunks ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE esg_reports ALTER COLUMN generated_at SET DEFAULT NOW();
+ALTER TABLE esg_reports ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE transactions ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE transactions ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE kpi_benchmarks ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE kpi_benchmarks ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE green_vendors ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE green_vendors ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE kpi_evaluations ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE kpi_evaluations ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE kpi_evaluation_documents ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE kpi_evaluation_results ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE ai_audit_logs ALTER COLUMN timestamp SET DEFAULT NOW();
+ALTER TABLE report_chat_sessions ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE report_chat_sessions ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE report_chat_messages ALTER COLUMN created_at SET DEFAULT NOW();
+
+-- updated_at is set by the UPDATE statement itself (SET updated_at = now()),
+-- so no trigger is needed.
+
+-- Verify defaults
+SELECT table_name, column_name, data_type, column_default
+FROM information_schema.columns
+WHERE column_name IN ('created_at', 'updated_at', 'generated_at', 'timestamp')
+ORDER BY table_name, column_name;
@@ -0,0 +1,21 @@
+-- Migration: Replace single-column indexes with the composites the queries use
+-- CONCURRENTLY cannot run inside a transaction block; run these statements one at a time.
+
+-- KPI benchmarks are looked up by (sector, metric)
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_kpi_bench_sector_metric
+ON kpi_benchmarks(sector, metric);
+DROP INDEX CONCURRENTLY IF EXISTS ix_kpi_benchmarks_sector;
+DROP INDEX CONCURRENTLY IF EXISTS ix_kpi_benchmarks_metric;
+
+-- ESG report lists: WHERE user_id = ? ORDER BY generated_at DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_esg_user_gen
+ON esg_reports(user_id, generated_at);
+DROP INDEX CONCURRENTLY IF EXISTS ix_esg_reports_user_id;
+
+-- Reverse lookups from a document to its evaluations
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_kpi_evaldoc_doc
+ON kpi_evaluation_documents(document_id);
+
+-- Evaluation history ordered by created_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_kpi_eval_created_at
+ON kpi_evaluations(created_at);
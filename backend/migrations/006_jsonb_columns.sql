@@ -0,0 +1,25 @@
+-- Migration: Store evaluation results, audit snapshots and chat citations as JSONB
+-- The models now read/write these columns as parsed JSON instead of strings.
+
+-- Step 1: Convert the text columns in place
+ALTER TABLE kpi_evaluation_results
+ALTER COLUMN result_json TYPE JSONB USING result_json::jsonb;
+
+ALTER TABLE ai_audit_logs
+ALTER COLUMN input_snapshot TYPE JSONB USING input_snapshot::jsonb;
+
+ALTER TABLE ai_audit_logs
+ALTER COLUMN output_snapshot TYPE JSONB USING output_snapshot::jsonb;
+
+ALTER TABLE report_chat_messages
+ALTER COLUMN citations_json TYPE JSONB USING citations_json::jsonb;
+
+-- Step 2: Audit entries are listed per evaluation in time order
+CREATE INDEX IF NOT EXISTS ix_ai_audit_eval_time
+ON ai_audit_logs(evaluation_id, timestamp);
+DROP INDEX IF EXISTS ix_ai_audit_logs_evaluation_id;
+
+-- Verify changes
+SELECT table_name, column_name, data_type
+FROM information_schema.columns
+WHERE column_name IN ('result_json', 'input_snapshot', 'output_snapshot', 'citations_json');
@@ -0,0 +1,4 @@
+-- Migration: Restrict documents.file_type to the values the upload endpoint writes
+
+ALTER TABLE documents
+ADD CONSTRAINT ck_documents_file_type CHECK (file_type IN ('pdf', 'image'));
@@ -0,0 +1,6 @@
+-- Migration: Serve chat history (WHERE session_id = ? ORDER BY created_at) from one index
+-- CONCURRENTLY cannot run inside a transaction block; run these statements one at a time.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_rcm_session_created
+ON report_chat_messages(session_id, created_at);
+DROP INDEX CONCURRENTLY IF EXISTS ix_report_chat_messages_session_id;
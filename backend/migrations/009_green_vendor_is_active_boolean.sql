@@ -0,0 +1,13 @@
+-- Migration: Store green_vendors.is_active as BOOLEAN and index active vendors by category
+
+-- Step 1: Convert the 0/1 integer column
+ALTER TABLE green_vendors ALTER COLUMN is_active DROP DEFAULT;
+ALTER TABLE green_vendors
+ALTER COLUMN is_active TYPE BOOLEAN USING is_active::boolean;
+UPDATE green_vendors SET is_active = TRUE WHERE is_active IS NULL;
+ALTER TABLE green_vendors ALTER COLUMN is_active SET DEFAULT TRUE;
+ALTER TABLE green_vendors ALTER COLUMN is_active SET NOT NULL;
+
+-- Step 2: Partial index covering only active vendors
+CREATE INDEX IF NOT EXISTS ix_vendor_active_cat
+ON green_vendors(category) WHERE is_active;
@@ -0,0 +1,10 @@
+-- Migration: Replace the IVFFlat index on document_embeddings with HNSW
+-- HNSW needs no training lists, keeps recall as rows are added, and gives faster
+-- top-k cosine search than IVFFlat built on a small initial table (pgvector >= 0.5.0).
+-- CONCURRENTLY cannot run inside a transaction block; run these statements one at a time.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_embeddings_vector_hnsw
+ON document_embeddings
+USING hnsw (embedding vector_cosine_ops);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_document_embeddings_vector;
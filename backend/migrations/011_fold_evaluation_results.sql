@@ -0,0 +1,21 @@
+-- Migration: Store the full evaluation result on kpi_evaluations
+-- kpi_evaluation_results was strictly one row per evaluation; reading a report no
+-- longer needs a second lookup. Large values are TOASTed out of line automatically.
+
+-- Step 1: Add the column
+ALTER TABLE kpi_evaluations
+ADD COLUMN IF NOT EXISTS result_json JSONB;
+
+-- Step 2: Copy existing results
+UPDATE kpi_evaluations e
+SET result_json = r.result_json
+FROM kpi_evaluation_results r
+WHERE r.evaluation_id = e.id;
+
+-- Step 3: Drop the old table (run after verifying the copy)
+DROP TABLE IF EXISTS kpi_evaluation_results;
+
+-- Verify
+SELECT COUNT(*) AS evaluations_with_results
+FROM kpi_evaluations
+WHERE result_json IS NOT NULL;
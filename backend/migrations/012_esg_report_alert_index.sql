@@ -0,0 +1,7 @@
+-- Migration: Partial index for compliance alerts
+-- Serves WHERE user_id = ? AND overall_compliance_score < 60 ORDER BY generated_at DESC LIMIT 10
+-- CONCURRENTLY cannot run inside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_esg_user_gen_alert
+ON esg_reports(user_id, generated_at)
+WHERE overall_compliance_score < 60;
@@ -22,12 +22,10 @@ ON document_embeddings(document_id);
 CREATE INDEX IF NOT EXISTS idx_document_embeddings_created_at 
 ON document_embeddings(created_at DESC);
 
--- Create the vector similarity search index (IVFFlat for better performance)
--- Adjust lists parameter based on your data size (lists = sqrt(n) where n is row count)
-CREATE INDEX IF NOT EXISTS idx_document_embeddings_vector 
-ON document_embeddings 
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- Create the vector similarity search index (HNSW: no training step, keeps recall as rows are added)
+CREATE INDEX IF NOT EXISTS idx_document_embeddings_vector_hnsw
+ON document_embeddings
+USING hnsw (embedding vector_cosine_ops);
 
 -- Function to search for similar document chunks
 CREATE OR REPLACE FUNCTION match_document_embeddings(
@@ -33,6 +33,7 @@ CREATE TABLE IF NOT EXISTS kpi_evaluations (
     needs_review BOOLEAN DEFAULT FALSE,
     banker_decision VARCHAR(50), -- PENDING, ACCEPT_AS_IS, NEGOTIATE, REJECT, OVERRIDE_AI
     banker_override_reason TEXT,
+    result_json JSONB, -- Full detailed result (TOASTed out of line)
     
     created_by_user_id INTEGER,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -50,16 +51,6 @@ CREATE TABLE IF NOT EXISTS kpi_evaluation_documents (
     PRIMARY KEY (evaluation_id, document_id)
 );
 
--- Store full detailed JSON result to avoid massive columns in main table
-CREATE TABLE IF NOT EXISTS kpi_evaluation_results (
-    id SERIAL PRIMARY KEY,
-    evaluation_id INTEGER NOT NULL UNIQUE REFERENCES kpi_evaluations(id) ON DELETE CASCADE,
-    result_json JSONB NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
-
-CREATE INDEX IF NOT EXISTS ix_kpi_evaluation_results_evaluation_id ON kpi_evaluation_results(evaluation_id);
-
 -- Audit logs for AI operations
 CREATE TABLE IF NOT EXISTS ai_audit_logs (
     id SERIAL PRIMARY KEY,
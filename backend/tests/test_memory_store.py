@@ -0,0 +1,126 @@
+"""Tests for the MemoryStore local fallback: token index, LFU eviction and write coalescing."""
+import asyncio
+
+from app.core import memory_store
+from app.core.memory_store import MemoryStore
+
+
+def _local_store(max_facts: int = 5000) -> MemoryStore:
+    store = MemoryStore(api_key="test")
+    # Local-only mode, whether or not the Supermemory SDK is installed
+    store.client = None
+    store._search_fn = None
+    store.max_local_facts = max_facts
+    return store
+
+
+def _keys(results):
+    return [r["key"] for r in results]
+
+
+def test_retrieve_matches_whole_words_and_fragments():
+    async def run():
+        store = _local_store()
+        await store.store_fact("analysis", "a", "carbon emissions fell")
+        await store.store_fact("analysis", "b", "emission target")
+        await store.store_fact("analysis", "c", "water usage")
+        assert _keys(await store.retrieve_memory("emission")) == ["b", "a"]
+        assert _keys(await store.retrieve_memory("water usage")) == ["c"]
+        assert await store.retrieve_memory("usage water") == []
+        assert _keys(store._search_local_facts("emission target")) == ["b", "a"]
+    asyncio.run(run())
+
+
+def test_retrieve_filters_by_category_newest_first():
+    async def run():
+        store = _local_store()
+        await store.store_fact("kpi", "k1", {"metric": "scope 1 emissions"})
+        await store.store_fact("analysis", "a1", {"note": "scope 1 emissions"})
+        await store.store_fact("kpi", "k2", {"metric": "scope 2 emissions"})
+        assert _keys(await store.retrieve_memory("emissions", category="kpi")) == ["k2", "k1"]
+        assert _keys(store._search_local_facts("", category="analysis")) == ["a1"]
+        assert len(await store.retrieve_memory("emissions")) == 3
+    asyncio.run(run())
+
+
+def test_retrieve_limits_to_five_newest():
+    async def run():
+        store = _local_store()
+        for i in range(8):
+            await store.store_fact("analysis", f"k{i}", f"emissions report {i}")
+        # A newer fact matching only as a word fragment still ranks by recency
+        await store.store_fact("analysis", "frag", "emissionsreport")
+        assert _keys(await store.retrieve_memory("emissions")) == ["frag", "k7", "k6", "k5", "k4"]
+    asyncio.run(run())
+
+
+def test_eviction_keeps_newly_stored_fact():
+    async def run():
+        store = _local_store(max_facts=3)
+        for key in ("a", "b", "c"):
+            await store.store_fact("kpi", key, f"value {key}")
+        for key in ("a", "b", "c"):
+            assert _keys(await store.retrieve_memory(f"value {key}")) == [key]
+        await store.store_fact("kpi", "d", "value d")
+        assert _keys(await store.retrieve_memory("value d")) == ["d"]
+        assert len(store._local_facts) == 3
+    asyncio.run(run())
+
+
+def test_eviction_drops_least_retrieved_then_oldest():
+    async def run():
+        store = _local_store(max_facts=3)
+        for key in ("a", "b", "c"):
+            await store.store_fact("kpi", key, f"value {key}")
+        await store.retrieve_memory("value a")
+        await store.retrieve_memory("value a")
+        await store.retrieve_memory("value c")
+        # b has no hits and goes first
+        await store.store_fact("kpi", "d", "value d")
+        store._index_pending()
+        assert {fact["key"] for fact in store._local_facts.values()} == {"a", "c", "d"}
+        # Then d (no hits, no longer in the batch being inserted) before c and a
+        await store.store_fact("kpi", "e", "value e")
+        store._index_pending()
+        assert {fact["key"] for fact in store._local_facts.values()} == {"a", "c", "e"}
+        # Evicted facts are gone from the token index too
+        assert "b" not in store._token_index and "d" not in store._token_index
+        assert all(store._local_facts.keys() >= ids for ids in store._token_index.values())
+    asyncio.run(run())
+
+
+def test_batch_larger_than_capacity_keeps_newest():
+    async def run():
+        store = _local_store(max_facts=2)
+        for key in ("a", "b", "c", "d"):
+            await store.store_fact("kpi", key, f"value {key}")
+        assert _keys(store._search_local_facts("value")) == ["d", "c"]
+    asyncio.run(run())
+
+
+def test_writes_are_coalesced_until_read_or_timer():
+    async def run():
+        store = _local_store()
+        await store.store_fact("analysis", "a", "first fact")
+        await store.store_fact("analysis", "b", "second fact")
+        assert len(store._unindexed) == 2 and not store._local_facts
+        # A read indexes buffered writes first
+        assert _keys(await store.retrieve_memory("fact")) == ["b", "a"]
+        assert not store._unindexed and store._index_timer is None
+
+        await store.store_fact("analysis", "c", "third fact")
+        assert store._index_timer is not None
+        await asyncio.sleep(memory_store.LOCAL_INDEX_DELAY_SECONDS * 3)
+        assert not store._unindexed and len(store._local_facts) == 3
+    asyncio.run(run())
+
+
+def test_full_batch_is_indexed_immediately():
+    async def run():
+        store = _local_store()
+        for i in range(memory_store.LOCAL_INDEX_BATCH_SIZE):
+            await store.store_fact("analysis", f"k{i}", f"fact {i}")
+        assert not store._unindexed
+        assert len(store._local_facts) == memory_store.LOCAL_INDEX_BATCH_SIZE
+        assert store._index_timer is None
+    asyncio.run(run())